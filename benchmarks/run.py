@@ -0,0 +1,205 @@
+"""
+Бенчмарки клиента против локальной заглушки API (benchmarks/server.py).
+
+    python benchmarks/run.py [--requests 500] [--threads 5] [--json]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import json
+import os
+from statistics import mean
+import sys
+from time import perf_counter
+import tracemalloc
+
+from requests import Request, Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moysklad.http import FakeTransport, MoySkladHttpClient, RequestConfig  # noqa E402
+from moysklad.http.utils import HTTPMethod  # noqa E402
+from moysklad.queries import Expand, Query, Select  # noqa E402
+from server import FakeApiServer, FakeApiState  # noqa E402
+
+
+def percentile(values, q):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(q * (len(values) - 1))))
+    return values[index]
+
+
+def make_client(server: FakeApiServer, rate_limited: bool = False) -> MoySkladHttpClient:
+    client = MoySkladHttpClient(f'bench-{id(server)}', 'password')
+    client._endpoint = server.endpoint  # pylint: disable=protected-access
+    if not rate_limited:
+        client.set_rate_limiter(None)
+    return client
+
+
+def timed(call, count, threads=1):
+    def run(_):
+        started = perf_counter()
+        call()
+        return perf_counter() - started
+
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(run, range(count)))
+    elapsed = perf_counter() - started
+    return {
+        'requests': count,
+        'rps': round(count / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def bench_overhead(server, count):
+    """Накладные расходы клиента относительно голого requests.Session"""
+    client = make_client(server)
+    session = Session()
+    query = Query(Select(limit=1))
+    # тот же URL, параметры, заголовки и авторизация, что у клиента
+    payload = client._build_request(  # pylint: disable=protected-access
+        HTTPMethod.GET, 'entity/product', None, RequestConfig(), query,
+    )
+
+    def raw_call():
+        # proxies передаются явно, как в RequestsTransport: иначе Session.send
+        # на каждый запрос ищет прокси в окружении, а клиент - нет
+        prepared = session.prepare_request(Request(**payload))
+        return session.send(
+            prepared, proxies=client._proxies,  # pylint: disable=protected-access
+        ).json()
+
+    def client_call():
+        return client.get('entity/product', query=query)
+
+    # прогрев соединений и потоков сервера
+    timed(raw_call, 20)
+    timed(client_call, 20)
+
+    raw = timed(raw_call, count)
+    wrapped = timed(client_call, count)
+    client.close()
+    session.close()
+    return {
+        'raw': raw,
+        'client': wrapped,
+        'overhead_us': round((wrapped['p50_ms'] - raw['p50_ms']) * 1000, 1),
+    }
+
+
+def bench_transport(count):
+    """Накладные расходы клиента без сети, на FakeTransport"""
+    transport = FakeTransport()
+    transport.add_response('GET', 'entity/product', {
+        'meta': {'size': 1, 'limit': 1, 'offset': 0},
+        'rows': [{'id': '1', 'name': 'product'}],
+    })
+    client = MoySkladHttpClient('bench-fake', 'password', transport=transport)
+    client.set_rate_limiter(None)
+    query = Query(Select(limit=1))
+    return timed(lambda: client.get('entity/product', query=query), count)
+
+
+def bench_throughput(server, count, threads):
+    client = make_client(server)
+    result = timed(lambda: client.get('entity/product', query=Query(Select(limit=10))),
+                   count, threads)
+    client.close()
+    return result
+
+
+def bench_pages(server, count):
+    client = make_client(server)
+    cases = {
+        'small': Query(Select(limit=10)),
+        'large': Query(Select(limit=1000)),
+        'expanded': Query(Select(limit=1000), Expand('agent', 'positions')),
+    }
+    results = {}
+    for name, query in cases.items():
+        latencies = []
+        for _ in range(count):
+            started = perf_counter()
+            client.get('entity/customerorder', query=query)
+            latencies.append(perf_counter() - started)
+
+        for mode, options in (('full', None), ('lean', RequestConfig(keep_response=False))):
+            gc.collect()
+            tracemalloc.start()
+            response = client.get('entity/customerorder', query=query, options=options)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.setdefault(name, {})[f'{mode}_retained_kb'] = current // 1024
+            results[name][f'{mode}_peak_kb'] = peak // 1024
+            del response
+
+        results[name].update({
+            'mean_ms': round(mean(latencies) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        })
+    client.close()
+    return results
+
+
+def bench_collection(server, threads):
+    client = make_client(server)
+    results = {}
+    for name, fetch in (
+            ('iter_rows', lambda: sum(1 for _ in client.iter_rows('entity/product'))),
+            ('fetch_all', lambda: len(client.fetch_all('entity/product', max_workers=threads))),
+    ):
+        started = perf_counter()
+        rows = fetch()
+        results[name] = {'rows': rows, 'seconds': round(perf_counter() - started, 3)}
+    client.close()
+    return results
+
+
+def bench_throttled(count, threads):
+    state = FakeApiState(error_rate=0.1, rate_limit=45, rate_interval=1.0)
+    with FakeApiServer(state) as server:
+        client = make_client(server, rate_limited=True)
+        result = timed(lambda: client.get('entity/product', query=Query(Select(limit=1))),
+                       count, threads)
+        client.close()
+    result.update({
+        'server_requests': state.requests,
+        'throttled': state.throttled,
+        'retries': client.retry_policy.stats['retries'],
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=5)
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    results = {}
+    with FakeApiServer(FakeApiState(latency=args.latency)) as server:
+        results['overhead'] = bench_overhead(server, args.requests)
+        results['throughput'] = bench_throughput(server, args.requests, args.threads)
+        results['pages'] = bench_pages(server, args.pages)
+        results['collection'] = bench_collection(server, args.threads)
+    results['transport'] = bench_transport(args.requests)
+    results['throttled'] = bench_throttled(min(args.requests, 200), args.threads)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        print(f'== {name}')
+        for key, value in result.items():
+            print(f'  {key}: {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Локальная заглушка JSON API МойСклад для бенчмарков.
+Отдает списки с пагинацией, заголовки ограничений, 429 и задержки.
+"""
+import argparse
+import json
+from random import Random
+from threading import Lock, Thread
+from time import monotonic, sleep
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from uuid import UUID
+from zlib import crc32
+
+API_PREFIX = '/api/remap/1.2/'
+
+
+def make_id(entity_name: str, index: int) -> str:
+    return str(UUID(int=(crc32(entity_name.encode()) << 64) | index))
+
+
+class FakeApiState:
+    def __init__(self, collection_size: int = 5000, latency: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: int = 0,
+                 rate_interval: float = 3.0, seed: int = 0) -> None:
+        self.collection_size = collection_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_interval = rate_interval
+        self.requests = 0
+        self.throttled = 0
+        self._random = Random(seed)
+        self._lock = Lock()
+        self._window_start = monotonic()
+        self._window_count = 0
+
+    def admit(self):
+        """Возвращает (пропустить ли запрос, остаток лимита, мс до сброса)"""
+        with self._lock:
+            self.requests += 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.throttled += 1
+                return False, 0, 50
+            if not self.rate_limit:
+                return True, None, None
+            now = monotonic()
+            if now - self._window_start >= self.rate_interval:
+                self._window_start = now
+                self._window_count = 0
+            reset = int((self.rate_interval - (now - self._window_start)) * 1000)
+            if self._window_count >= self.rate_limit:
+                self.throttled += 1
+                return False, 0, reset
+            self._window_count += 1
+            return True, self.rate_limit - self._window_count, reset
+
+
+def make_entity(entity_name: str, index: int, base_url: str, expand: set) -> dict:
+    id_ = make_id(entity_name, index)
+    entity = {
+        'meta': {
+            'href': f'{base_url}entity/{entity_name}/{id_}',
+            'type': entity_name,
+            'mediaType': 'application/json',
+        },
+        'id': id_,
+        'updated': '2020-01-01 00:00:00.000',
+        'name': f'{entity_name} {index}',
+        'code': f'{index:08d}',
+        'sum': index * 100,
+        'archived': False,
+        'agent': {'meta': {
+            'href': f'{base_url}entity/counterparty/{make_id("counterparty", index % 50)}',
+            'type': 'counterparty',
+        }},
+    }
+    if 'agent' in expand:
+        entity['agent'] = dict(
+            entity['agent'], id=make_id('counterparty', index % 50),
+            name=f'counterparty {index % 50}', email='agent@example.com',
+            phone='+70000000000', tags=['a', 'b'],
+        )
+    if 'positions' in expand:
+        entity['positions'] = {
+            'meta': {'href': f'{base_url}entity/{entity_name}/{id_}/positions', 'size': 10},
+            'rows': [
+                {
+                    'id': make_id('position', index * 10 + pos),
+                    'quantity': pos + 1,
+                    'price': 1000.0 + pos,
+                    'assortment': {'meta': {
+                        'href': f'{base_url}entity/product/{make_id("product", pos)}',
+                        'type': 'product',
+                    }},
+                }
+                for pos in range(10)
+            ],
+        }
+    return entity
+
+
+def make_handler(state: FakeApiState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status: int, body, headers=None) -> None:
+            payload = json.dumps(body, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json;charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, str(value))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _handle(self, method: str) -> None:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+
+            if state.latency:
+                sleep(state.latency)
+
+            admitted, remaining, reset = state.admit()
+            headers = {}
+            if state.rate_limit:
+                headers = {
+                    'X-RateLimit-Limit': state.rate_limit,
+                    'X-RateLimit-Remaining': remaining,
+                    'X-Lognex-Retry-TimeInterval': int(state.rate_interval * 1000),
+                    'X-Lognex-Reset': reset,
+                }
+            if not admitted:
+                headers['X-Lognex-Retry-After'] = reset
+                self._reply(429, {'errors': [{'code': 1049, 'error': 'Too many requests'}]}, headers)
+                return
+
+            url = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            base_url = f'http://{self.headers.get("Host")}{API_PREFIX}'
+            parts = url.path[len(API_PREFIX):].strip('/').split('/')
+            if not url.path.startswith(API_PREFIX) or parts[0] != 'entity' or len(parts) < 2:
+                self._reply(404, {'errors': [{'code': 1005, 'error': 'Not found'}]})
+                return
+
+            entity_name = parts[1]
+            expand = set(filter(None, params.get('expand', '').split(',')))
+            if method == 'POST':
+                items = body if isinstance(body, list) else [body]
+                created = [
+                    make_entity(entity_name, index, base_url, set()) for index, _ in enumerate(items)
+                ]
+                self._reply(200, created if isinstance(body, list) else created[0], headers)
+            elif len(parts) == 2:
+                limit = min(int(params.get('limit', 1000)), 1000)
+                offset = int(params.get('offset', 0))
+                size = state.collection_size
+                meta = {
+                    'href': f'{base_url}entity/{entity_name}',
+                    'type': entity_name,
+                    'size': size,
+                    'limit': limit,
+                    'offset': offset,
+                }
+                if offset + limit < size:
+                    meta['nextHref'] = (
+                        f'{base_url}entity/{entity_name}?limit={limit}&offset={offset + limit}'
+                    )
+                rows = [
+                    make_entity(entity_name, index, base_url, expand)
+                    for index in range(offset, min(offset + limit, size))
+                ]
+                self._reply(200, {'context': {'employee': {}}, 'meta': meta, 'rows': rows}, headers)
+            elif parts[2] == 'metadata':
+                self._reply(200, {'meta': {'type': entity_name}, 'attributes': []}, headers)
+            else:
+                self._reply(200, make_entity(entity_name, 0, base_url, expand), headers)
+
+        def do_GET(self):
+            self._handle('GET')
+
+        def do_POST(self):
+            self._handle('POST')
+
+        def do_PUT(self):
+            self._handle('PUT')
+
+    return Handler
+
+
+class FakeApiServer:
+    def __init__(self, state: FakeApiState, host: str = '127.0.0.1', port: int = 0) -> None:
+        self.state = state
+        self._server = ThreadingHTTPServer((host, port), make_handler(state))
+        self._server.daemon_threads = True
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}{API_PREFIX}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--size', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=0)
+    args = parser.parse_args()
+
+    state = FakeApiState(args.size, args.latency, args.error_rate, args.rate_limit)
+    with FakeApiServer(state, port=args.port) as server:
+        print(f'Serving {server.endpoint}')
+        try:
+            while True:
+                sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import Optional
 from zlib import crc32
 
-from .http import MoySkladHttpClient
+from .http import AsyncMoySkladHttpClient, MoySkladHttpClient
 from .urls import ApiUrlRegistry
 
 
@@ -12,7 +12,11 @@ class MoySklad:
 
     def __init__(self, login: str, password: str, pos_token: str,
                  hash_code: str) -> None:
+        self._login = login
+        self._password = password
+        self._pos_token = pos_token
         self._client = MoySkladHttpClient(login, password, pos_token)
+        self._async_client: Optional[AsyncMoySkladHttpClient] = None
         self._methods = ApiUrlRegistry()
         self._hash_code = hash_code
 
@@ -40,8 +44,27 @@ class MoySklad:
     def get_client(self) -> MoySkladHttpClient:
         return self._client
 
+    def get_async_client(self) -> AsyncMoySkladHttpClient:
+        if self._async_client is None:
+            self._async_client = AsyncMoySkladHttpClient(
+                self._login, self._password, self._pos_token,
+            )
+        return self._async_client
+
     def get_methods(self) -> ApiUrlRegistry:
         return self._methods
 
     def set_pos_token(self, pos_token) -> None:
+        self._pos_token = pos_token
         self._client.set_pos_token(pos_token)
+        if self._async_client is not None:
+            self._async_client.set_pos_token(pos_token)
+
+    def close(self) -> None:
+        self._client.close()
+
+    async def aclose(self) -> None:
+        """Закрывает оба клиента, в том числе сессию асинхронного"""
+        self._client.close()
+        if self._async_client is not None:
+            await self._async_client.close()
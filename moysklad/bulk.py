@@ -0,0 +1,159 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+from .exceptions import ApiResponseException
+from .http import MoySkladHttpClient, RequestConfig
+from .http.rate_limit import MAX_PARALLEL_REQUESTS
+from .urls import ApiUrlRegistry
+
+MAX_BULK_SIZE = 1000
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class BulkItemResult:
+    def __init__(self, index: int, item: dict,
+                 entity: Optional[dict] = None,
+                 errors: Optional[list] = None,
+                 exception: Optional[Exception] = None) -> None:
+        self.index = index
+        self.item = item
+        self.entity = entity
+        self.errors = errors
+        self.exception = exception
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and self.exception is None
+
+    def __str__(self):
+        status = 'ok' if self.ok else 'failed'
+        return f'BulkItemResult [{self.index}]: {status}'
+
+
+class BulkResult:
+    """Результат массовой операции, по одному BulkItemResult на каждый элемент"""
+
+    def __init__(self, items: List[BulkItemResult]) -> None:
+        self.items = items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index) -> BulkItemResult:
+        return self.items[index]
+
+    @property
+    def succeeded(self) -> List[BulkItemResult]:
+        return [item for item in self.items if item.ok]
+
+    @property
+    def failed(self) -> List[BulkItemResult]:
+        return [item for item in self.items if not item.ok]
+
+    def __str__(self):
+        return f'BulkResult [{len(self.succeeded)}/{len(self.items)}]'
+
+
+class BulkWriter:
+    """
+    Массовое создание и обновление сущностей.
+    Элементы отправляются пачками до chunk_size штук, пачки
+    выполняются параллельно в max_workers потоках.
+    """
+
+    def __init__(self, client: MoySkladHttpClient,
+                 chunk_size: int = MAX_BULK_SIZE,
+                 max_workers: int = MAX_PARALLEL_REQUESTS,
+                 options: Optional[RequestConfig] = None) -> None:
+        self._client = client
+        self._methods = ApiUrlRegistry()
+        self._chunk_size = min(chunk_size, MAX_BULK_SIZE)
+        self._max_workers = max_workers
+        self._options = options
+
+    def _run(self, send, items: Iterable[dict]) -> BulkResult:
+        results = []
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            pending = deque()
+            offset = 0
+            for chunk in chunked(items, self._chunk_size):
+                if len(pending) >= self._max_workers * 2:
+                    results.extend(pending.popleft().result())
+                pending.append(executor.submit(send, offset, chunk))
+                offset += len(chunk)
+            while pending:
+                results.extend(pending.popleft().result())
+        return BulkResult(results)
+
+    @staticmethod
+    def _map_rows(offset: int, chunk: list, rows: list,
+                  item_errors: Optional[list] = None) -> List[BulkItemResult]:
+        results = []
+        for index, item in enumerate(chunk):
+            row = rows[index] if index < len(rows) else None
+            errors = item_errors[index] if item_errors and index < len(item_errors) else None
+            if errors is None and isinstance(row, dict):
+                errors = row.get('errors')
+            results.append(BulkItemResult(
+                index=offset + index,
+                item=item,
+                entity=None if errors else row,
+                errors=errors,
+            ))
+        return results
+
+    @staticmethod
+    def _map_exception(offset: int, chunk: list,
+                       exc: Exception) -> List[BulkItemResult]:
+        return [
+            BulkItemResult(index=offset + index, item=item, exception=exc)
+            for index, item in enumerate(chunk)
+        ]
+
+    def _post(self, url: str, items: Iterable[dict]) -> BulkResult:
+        def send(offset, chunk):
+            try:
+                response = self._client.post(url, data=chunk, options=self._options)
+            except ApiResponseException as exc:
+                item_errors = exc.get_item_errors()
+                if item_errors is None:
+                    return self._map_exception(offset, chunk, exc)
+                return self._map_rows(offset, chunk, exc.response.json(), item_errors)
+            except Exception as exc:  # pylint: disable=broad-except
+                return self._map_exception(offset, chunk, exc)
+            return self._map_rows(offset, chunk, response.rows or [])
+
+        return self._run(send, items)
+
+    def create_or_update(self, entity_name: str,
+                         items: Iterable[dict]) -> BulkResult:
+        """
+        Массовое создание и обновление.
+        Элементы с meta обновляются, без meta создаются.
+        """
+        return self._post(self._methods.get_create_url(entity_name), items)
+
+    def delete(self, entity_name: str, items: Iterable[dict]) -> BulkResult:
+        """
+        Массовое удаление.
+        Принимает сущности или их meta, в BulkItemResult.item лежит
+        отправленная ссылка вида {'meta': {...}}.
+        """
+        refs = (
+            {'meta': item['meta']} if 'meta' in item else {'meta': item}
+            for item in items
+        )
+        return self._post(self._methods.get_mass_delete_url(entity_name), refs)
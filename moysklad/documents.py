@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from typing import IO, Iterable, Optional, Tuple, Union
+
+from .http import MoySkladHttpClient, RequestConfig
+from .http.rate_limit import MAX_PARALLEL_REQUESTS
+from .urls import ApiUrlRegistry
+
+Sink = Union[str, IO[bytes]]
+
+
+class DocumentPrinter:
+    """
+    Печать документов по шаблону с потоковой загрузкой файла.
+    Сервер отвечает ссылкой на файл, файл скачивается кусками в sink.
+    """
+
+    def __init__(self, client: MoySkladHttpClient,
+                 max_workers: int = MAX_PARALLEL_REQUESTS,
+                 options: Optional[RequestConfig] = None) -> None:
+        self._client = client
+        self._max_workers = max_workers
+        self._options = options
+        self._methods = ApiUrlRegistry()
+
+    def get_file_url(self, entity_name: str, id_: str, template: dict,
+                     extension: str = 'pdf') -> str:
+        options = copy(self._options) if self._options else RequestConfig()
+        options.follow_redirects = False
+        return self._client.post(
+            self._methods.get_document_export_url(entity_name, id_),
+            data={'template': {'meta': template.get('meta', template)}, 'extension': extension},
+            options=options,
+        )
+
+    def export(self, entity_name: str, id_: str, template: dict, sink: Sink,
+               extension: str = 'pdf') -> int:
+        """Печатает документ в sink (путь или бинарный файл), возвращает число байт"""
+        file_url = self.get_file_url(entity_name, id_, template, extension)
+        return self._client.download(file_url, sink, options=self._options)
+
+    def export_many(self, jobs: Iterable[Tuple[str, str, dict, Sink]],
+                    extension: str = 'pdf') -> list:
+        """
+        Параллельная печать (entity_name, id, template, sink).
+        Для каждого задания возвращает число байт или исключение.
+        """
+        def export(job):
+            try:
+                return self.export(*job, extension=extension)
+            except Exception as exc:  # pylint: disable=broad-except
+                return exc
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            return list(executor.map(export, jobs))
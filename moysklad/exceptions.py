@@ -30,14 +30,24 @@ class ResponseParseException(Exception):
         return f'Response decode error: {self.message}'
 
 
+class AsyncTaskException(Exception):
+    def __init__(self, task: dict) -> None:
+        super().__init__()
+        self.task = task
+
+    def __str__(self) -> str:
+        return f'AsyncTaskError [{self.task.get("state")}]: {self.task.get("errors")}'
+
+
 class ApiResponseException(RequestFailedException):
-    def __init__(self, response: Response, errors) -> None:
+    def __init__(self, response: Response, errors, item_errors=None) -> None:
         super().__init__(response)
         error = errors[0]
         self._code = error.get('code')
         self._error_text = error.get('error')
         self._more_info = error.get('moreInfo')
         self._errors = errors
+        self._item_errors = item_errors
 
     def __str__(self) -> str:
         return f'ApiError [{self.get_api_code()}]: {self.get_error_text()}'
@@ -53,3 +63,7 @@ class ApiResponseException(RequestFailedException):
 
     def get_errors(self):
         return self._errors
+
+    def get_item_errors(self):
+        """Ошибки по каждому элементу массового запроса (None для успешных)"""
+        return self._item_errors
@@ -0,0 +1,220 @@
+import csv
+from itertools import islice
+import json
+from typing import IO, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+from .http import MoySkladHttpClient, RequestConfig
+from .http.rate_limit import MAX_PARALLEL_REQUESTS
+from .queries import Query, Select
+from .reports import get_href_id
+from .schema import SchemaRegistry
+from .urls import ApiUrlRegistry
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+# типы доп. полей в pyarrow, остальные (строки, даты, ссылки) - string
+ATTRIBUTE_ARROW_TYPES = {
+    'long': 'int64',
+    'double': 'float64',
+    'boolean': 'bool',
+}
+
+
+class Flattener:
+    """
+    Правила разворачивания строк в плоские записи:
+    вложенные объекты - ключи через separator, ссылки {'meta': ...} - id
+    из href, доп. поля - attr.<имя>, прочие списки - JSON-строки.
+    """
+
+    def __init__(self, separator: str = '.', max_depth: int = 3,
+                 drop: Sequence[str] = ('meta',)) -> None:
+        self.separator = separator
+        self.max_depth = max_depth
+        self.drop = frozenset(drop)
+
+    def flatten(self, row: dict) -> dict:
+        flat = {}
+        self._flatten(row, '', 0, flat)
+        return flat
+
+    @staticmethod
+    def _attribute_value(value):
+        if isinstance(value, dict):
+            return value.get('name', get_href_id(value.get('meta', {}).get('href')))
+        return value
+
+    def _flatten(self, value: dict, prefix: str, depth: int, flat: dict) -> None:
+        for key, item in value.items():
+            if depth == 0 and key in self.drop:
+                continue
+            name = f'{prefix}{key}'
+            if key == 'attributes' and isinstance(item, list):
+                for attribute in item:
+                    flat[f'{name}{self.separator}{attribute.get("name")}'] = \
+                        self._attribute_value(attribute.get('value'))
+            elif isinstance(item, dict):
+                if set(item) == {'meta'} or (depth > 0 and key == 'meta'):
+                    meta = item.get('meta', item)
+                    flat[name] = get_href_id(meta.get('href'))
+                elif depth + 1 >= self.max_depth:
+                    flat[name] = json.dumps(item, ensure_ascii=False)
+                else:
+                    self._flatten(item, f'{name}{self.separator}', depth + 1, flat)
+            elif isinstance(item, list):
+                flat[name] = json.dumps(item, ensure_ascii=False)
+            else:
+                flat[name] = item
+
+
+class NdjsonExportWriter:
+    flatten = False
+
+    def __init__(self, fp: IO[str]) -> None:
+        self._fp = fp
+
+    def write(self, rows: List[dict]) -> None:
+        self._fp.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+    def close(self) -> None:
+        self._fp.flush()
+
+
+class CsvExportWriter:
+    """
+    Колонки задаются явно: строки списка разреженные, и набор полей первой
+    страницы не совпадает с остальными. Поля вне columns пропускаются,
+    отсутствующие в строке - пустые. Колонки с доп. полями сущности
+    можно получить через Exporter.get_columns.
+    """
+    flatten = True
+
+    def __init__(self, fp: IO[str], columns: Sequence[str], **csv_options) -> None:
+        self._writer = csv.DictWriter(fp, list(columns), extrasaction='ignore', **csv_options)
+        self._fp = fp
+        self._header_written = False
+
+    def _write_header(self) -> None:
+        if not self._header_written:
+            self._writer.writeheader()
+            self._header_written = True
+
+    def write(self, rows: List[dict]) -> None:
+        self._write_header()
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._write_header()
+        self._fp.flush()
+
+
+class ParquetExportWriter:
+    """
+    Схема задается явно, по тем же причинам, что и колонки CsvExportWriter.
+    Поля вне схемы пропускаются, отсутствующие в строке - null.
+    Схему с доп. полями сущности можно получить через Exporter.get_schema.
+    """
+    flatten = True
+
+    def __init__(self, path: str, schema, **parquet_options) -> None:
+        if pyarrow is None:
+            raise ImportError('pyarrow is required for ParquetExportWriter')
+        self._schema = schema
+        self._writer = pyarrow.parquet.ParquetWriter(path, schema, **parquet_options)
+
+    def write(self, rows: List[dict]) -> None:
+        if rows:
+            self._writer.write_table(pyarrow.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def _batched(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Exporter:
+    """
+    Потоковая выгрузка списка сущностей в writer.
+    В памяти находятся только загружаемые страницы: не больше двух
+    при последовательной загрузке и 2 * max_workers при параллельной.
+    """
+
+    def __init__(self, client: MoySkladHttpClient,
+                 flattener: Optional[Flattener] = None,
+                 parallel: bool = False,
+                 max_workers: int = MAX_PARALLEL_REQUESTS,
+                 options: Optional[RequestConfig] = None) -> None:
+        self._client = client
+        self._flattener = flattener or Flattener()
+        self._parallel = parallel
+        self._max_workers = max_workers
+        self._options = options
+        self._methods = ApiUrlRegistry()
+
+    def _iter_pages(self, url: str, query: Optional[Query]) -> Iterable[List[dict]]:
+        if self._parallel:
+            return self._client.iter_pages_parallel(
+                url, query, self._options, self._max_workers,
+            )
+        rows = self._client.iter_rows(url, query, self._options)
+        return _batched(rows, Select.MAX_LIST_LIMIT)
+
+    def _get_attributes(self, entity_name: str) -> List[dict]:
+        return SchemaRegistry.for_account(self._client).get(entity_name).attributes
+
+    def _get_attribute_column(self, attribute: dict) -> str:
+        return f'attributes{self._flattener.separator}{attribute["name"]}'
+
+    def get_columns(self, entity_name: str, fields: Sequence[str]) -> List[str]:
+        """
+        Колонки для CsvExportWriter: fields и все доп. поля сущности
+        из ее метаданных, например get_columns('product', ['id', 'name', 'code'])
+        """
+        columns = list(fields)
+        columns.extend(
+            self._get_attribute_column(attribute)
+            for attribute in self._get_attributes(entity_name)
+        )
+        return columns
+
+    def get_schema(self, entity_name: str, fields: Mapping[str, 'pyarrow.DataType']):
+        """
+        Схема для ParquetExportWriter: fields (имя - тип pyarrow) и все
+        доп. поля сущности с типом по их метаданным
+        """
+        if pyarrow is None:
+            raise ImportError('pyarrow is required for Exporter.get_schema')
+        schema = list(fields.items())
+        for attribute in self._get_attributes(entity_name):
+            data_type = pyarrow.type_for_alias(
+                ATTRIBUTE_ARROW_TYPES.get(attribute.get('type'), 'string'),
+            )
+            schema.append((self._get_attribute_column(attribute), data_type))
+        return pyarrow.schema(schema)
+
+    def export(self, entity_name: str, writer,
+               query: Optional[Query] = None) -> int:
+        """Выгружает entity/{entity_name} и возвращает число строк"""
+        return self.export_url(self._methods.get_list_url(entity_name), writer, query)
+
+    def export_url(self, url: str, writer, query: Optional[Query] = None) -> int:
+        total = 0
+        try:
+            for rows in self._iter_pages(url, query):
+                if writer.flatten:
+                    rows = [self._flattener.flatten(row) for row in rows]
+                writer.write(rows)
+                total += len(rows)
+        finally:
+            writer.close()
+        return total
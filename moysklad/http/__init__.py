@@ -1,2 +1,10 @@
+from .async_client import AsyncMoySkladHttpClient  # noqa F401
+from .cache import MemoryCacheBackend, ResponseCache, ShelveCacheBackend  # noqa F401
 from .client import MoySkladHttpClient  # noqa F401
+from .metrics import MetricsCollector, RequestInfo, RequestObserver  # noqa F401
+from .rate_limit import RateLimiter  # noqa F401
+from .retry import RetryPolicy  # noqa F401
+from .singleflight import SingleFlight  # noqa F401
+from .stream import StreamingApiResponse  # noqa F401
+from .transport import FakeTransport, HttpxTransport, RequestsTransport, Transport  # noqa F401
 from .utils import RequestConfig  # noqa F401
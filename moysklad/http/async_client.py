@@ -0,0 +1,217 @@
+import asyncio
+from base64 import b64encode
+from typing import Dict, Optional, Union
+from weakref import WeakKeyDictionary
+
+from requests import Response
+
+from ..queries import Query
+from .base import BaseMoySkladHttpClient
+from .rate_limit import MAX_PARALLEL_REQUESTS
+from .retry import RetryPolicy
+from .utils import HTTPMethod, RequestConfig, build_response
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+DEFAULT_POOL_SIZE = 100
+
+
+class AsyncMoySkladHttpClient(BaseMoySkladHttpClient):
+    """
+    Асинхронный клиент на aiohttp.
+    Число одновременных запросов аккаунта ограничено max_parallel_requests:
+    семафор общий для всех клиентов одного логина в цикле событий.
+    Клиенты разных аккаунтов могут делить одну сессию aiohttp (session).
+    """
+    _semaphores: 'WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]' = \
+        WeakKeyDictionary()
+
+    def __init__(
+            self, login: str, password: str,
+            pos_token: Optional[str] = None,
+            version: str = '1.2',
+            pos_version: str = '1.0',
+            pool_size: int = DEFAULT_POOL_SIZE,
+            max_parallel_requests: int = MAX_PARALLEL_REQUESTS,
+            session=None,
+    ) -> None:
+        if aiohttp is None:
+            raise ImportError(
+                'aiohttp is required for AsyncMoySkladHttpClient, '
+                'install fs-moysklad-api[async]'
+            )
+        super().__init__(login, password, pos_token, version, pos_version)
+        self._pool_size = pool_size
+        self._max_parallel_requests = max_parallel_requests
+        self._session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    @property
+    def session(self):
+        if self._session is None or (self._owns_session and self._session.closed):
+            connector = aiohttp.TCPConnector(limit=self._pool_size)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        semaphores = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        if self._login not in semaphores:
+            semaphores[self._login] = asyncio.Semaphore(self._max_parallel_requests)
+        return semaphores[self._login]
+
+    async def close(self) -> None:
+        """Закрывает свою сессию; переданная в конструктор сессия не закрывается"""
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+            self._session = None
+
+    async def get(self, method: str,
+                  data: Union[dict, list] = None,
+                  query: Optional[Query] = None,
+                  options: Optional[RequestConfig] = None):
+        return await self._make_request(
+            http_method=HTTPMethod.GET,
+            api_method=method,
+            data=data,
+            options=options,
+            query=query,
+        )
+
+    async def post(self, method: str,
+                   data: Union[dict, list] = None,
+                   query: Optional[Query] = None,
+                   options: Optional[RequestConfig] = None):
+        return await self._make_request(
+            http_method=HTTPMethod.POST,
+            api_method=method,
+            data=data,
+            options=options,
+            query=query,
+        )
+
+    async def put(self, method: str,
+                  data: Union[dict, list] = None,
+                  query: Optional[Query] = None,
+                  options: Optional[RequestConfig] = None):
+        return await self._make_request(
+            http_method=HTTPMethod.PUT,
+            api_method=method,
+            data=data,
+            options=options,
+            query=query,
+        )
+
+    async def delete(self, method: str,
+                     data: Union[dict, list] = None,
+                     query: Optional[Query] = None,
+                     options: Optional[RequestConfig] = None):
+        return await self._make_request(
+            http_method=HTTPMethod.DELETE,
+            api_method=method,
+            data=data,
+            options=options,
+            query=query,
+        )
+
+    def _get_proxy(self, url: str) -> Optional[str]:
+        if not self._proxies:
+            return None
+        return self._proxies.get(url.split(':', 1)[0])
+
+    @staticmethod
+    def _get_auth_header(login: str, password: str) -> str:
+        # как HTTPBasicAuth в requests: логин и пароль в latin1
+        credentials = f'{login}:{password}'.encode('latin1')
+        return f'Basic {b64encode(credentials).decode("ascii")}'
+
+    async def _send(self, request_payload: dict, http_method: HTTPMethod,
+                    options: RequestConfig,
+                    retry_policy: Optional[RetryPolicy] = None) -> Response:
+        if retry_policy is not None:
+            retry_policy.count_request()
+
+        request_payload['headers'] = dict(
+            request_payload['headers'],
+            Authorization=self._get_auth_header(*request_payload.pop('auth')),
+        )
+        params = {
+            key: str(value)
+            for key, value in request_payload.pop('params').items()
+            if value is not None
+        }
+
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                delay = self._rate_limiter.reserve()
+                while delay > 0:
+                    await asyncio.sleep(delay)
+                    delay = self._rate_limiter.reserve()
+            if self._pre_request_sleep_time:
+                await asyncio.sleep(self._pre_request_sleep_time / 1000)
+
+            try:
+                async with self.semaphore:
+                    async with self.session.request(
+                            **request_payload,
+                            params=params,
+                            allow_redirects=options.follow_redirects,
+                            proxy=self._get_proxy(request_payload['url']),
+                    ) as res:
+                        body = await res.read()
+                        # ответ aiohttp приводится к requests.Response, чтобы
+                        # ApiResponse и исключения работали одинаково
+                        response = build_response(
+                            res.status, res.headers, body,
+                            url=str(res.url), reason=res.reason,
+                            encoding=res.charset,
+                        )
+            except aiohttp.ClientConnectionError:
+                if retry_policy is None or not retry_policy.should_retry_connection_error(
+                        http_method, attempt):
+                    raise
+                await asyncio.sleep(retry_policy.get_backoff(attempt))
+                attempt += 1
+                continue
+
+            if self._rate_limiter is not None:
+                self._rate_limiter.update(response.headers)
+
+            if retry_policy is None or not retry_policy.should_retry_status(
+                    http_method, response.status_code, attempt):
+                return response
+
+            await asyncio.sleep(retry_policy.get_backoff(attempt, response.headers))
+            attempt += 1
+
+    async def _make_request(
+            self, http_method: HTTPMethod,
+            api_method: str,
+            data: Optional[Union[dict, list]] = None,
+            options: Optional[RequestConfig] = None,
+            **kwargs,
+    ):
+        if not options:
+            options = RequestConfig()
+
+        request_payload = self._build_request(
+            http_method, api_method, data, options, kwargs.get('query'),
+        )
+
+        retry_policy = options.retry_policy or self._retry_policy
+        res = await self._send(request_payload, http_method, options, retry_policy)
+
+        if res.status_code >= 400:
+            raise self._get_request_exception(res)
+
+        return self._parse_response(res, http_method, options)
@@ -0,0 +1,209 @@
+from json import JSONDecodeError
+from typing import List, Optional, Union
+from urllib.parse import urlencode, urljoin
+
+from requests import Response
+
+from ..exceptions import (
+    ApiResponseException,
+    PosTokenException,
+    RequestFailedException,
+    ResponseParseException,
+)
+from ..queries import Query
+from .rate_limit import RateLimiter
+from .retry import RetryPolicy
+from .stream import StreamingApiResponse
+from .utils import (
+    DEBUG_RATE_HEADERS,
+    ApiResponse,
+    HTTPMethod,
+    RequestConfig,
+    is_binary_content_type,
+)
+
+JSON_REQUEST_TYPES = (HTTPMethod.POST, HTTPMethod.PUT, HTTPMethod.DELETE)
+
+DEFAULT_MAX_URL_LENGTH = 4096
+# запас под limit/offset, которые добавляются при постраничной загрузке
+PAGE_PARAMS_RESERVE = 32
+
+
+class BaseMoySkladHttpClient:
+    """
+    Общая часть синхронного и асинхронного клиентов:
+    сборка запроса, разбор ответа и преобразование ошибок.
+    """
+
+    def __init__(
+            self, login: str, password: str,
+            pos_token: Optional[str] = None,
+            version: str = '1.2',
+            pos_version: str = '1.0',
+    ) -> None:
+        self._login = login
+        self._password = password
+        self._pos_token = pos_token
+        self._pre_request_sleep_time: float = 0
+        self._proxies = None
+        self._rate_limiter: Optional[RateLimiter] = RateLimiter.for_account(login)
+        self._retry_policy: Optional[RetryPolicy] = RetryPolicy()
+        self._max_url_length = DEFAULT_MAX_URL_LENGTH
+
+        self._endpoint = f'https://api.moysklad.ru/api/remap/{version}/'
+        self._pos_endpoint = f'https://api.moysklad.ru/api/posap/{pos_version}/'
+
+    def set_pos_token(self, pos_token: str) -> None:
+        self._pos_token = pos_token
+
+    @property
+    def login(self) -> str:
+        return self._login
+
+    @property
+    def endpoint(self):
+        return self._endpoint
+
+    @property
+    def pos_endpoint(self):
+        return self._pos_endpoint
+
+    def set_pre_request_timeout(self, ms: float) -> None:
+        self._pre_request_sleep_time = ms
+
+    def set_proxies(self, proxies: Optional[dict]):
+        self._proxies = proxies
+
+    @property
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        return self._rate_limiter
+
+    def set_rate_limiter(self, rate_limiter: Optional[RateLimiter]) -> None:
+        self._rate_limiter = rate_limiter
+
+    @property
+    def retry_policy(self) -> Optional[RetryPolicy]:
+        return self._retry_policy
+
+    def set_retry_policy(self, retry_policy: Optional[RetryPolicy]) -> None:
+        self._retry_policy = retry_policy
+
+    @property
+    def max_url_length(self) -> int:
+        return self._max_url_length
+
+    def set_max_url_length(self, length: int) -> None:
+        self._max_url_length = length
+
+    def _get_url_length(self, api_method: str, query: Query) -> int:
+        params = [
+            (name, value)
+            for name, value in query.url_params.items()
+            if value is not None
+        ]
+        return len(urljoin(self._endpoint, api_method)) + 1 + len(urlencode(params))
+
+    def _split_query(self, api_method: str,
+                     query: Optional[Query]) -> List[Optional[Query]]:
+        """Делит запрос со слишком длинным фильтром in_ на части"""
+        if query is None:
+            return [query]
+        budget = self._max_url_length - PAGE_PARAMS_RESERVE
+        return query.split(lambda part: self._get_url_length(api_method, part) <= budget)
+
+    def _build_request(
+            self, http_method: HTTPMethod,
+            api_method: str,
+            data: Optional[Union[dict, list]],
+            options: RequestConfig,
+            query: Optional[Query] = None,
+    ) -> dict:
+        if not data:
+            data = {}
+
+        password = self._password
+        endpoint = self._endpoint
+
+        if options.use_pos_api:
+            if options.use_pos_token:
+                if not self._pos_token:
+                    raise PosTokenException('POS token is used, but it\'s invalid or empty')
+                password = self._pos_token
+            endpoint = self._pos_endpoint
+
+        headers = {
+            'Accept-Encoding': 'gzip'
+        }
+        if options.format_millisecond:
+            headers['X-Lognex-Format-Millisecond'] = 'true'
+        if options.disable_webhooks_dispatch:
+            headers['X-Lognex-WebHook-Disable'] = 'true'
+        if options.debug_rate_limit or self._rate_limiter is not None:
+            # без этих заголовков запроса API не присылает заголовки
+            # ограничений, по которым подстраивается RateLimiter
+            headers.update(DEBUG_RATE_HEADERS)
+        if options.custom_headers:
+            headers.update(options.custom_headers)
+
+        query = query or Query()
+        request_payload = {
+            'method': http_method.value,
+            'url': urljoin(endpoint, api_method),
+            'headers': headers,
+            'auth': (self._login, password),
+            'params': dict(query.url_params),
+        }
+
+        if not options.ignore_request_body:
+            if http_method == HTTPMethod.GET and isinstance(data, dict):
+                request_payload['params'].update(data)
+            elif http_method in JSON_REQUEST_TYPES:
+                request_payload['json'] = data
+            else:
+                raise NotImplementedError('Unsupported request type')
+
+        return request_payload
+
+    @staticmethod
+    def _get_request_exception(res: Response) -> RequestFailedException:
+        try:
+            res_json = res.json()
+        except JSONDecodeError:
+            return RequestFailedException(res)
+
+        if isinstance(res_json, list):
+            item_errors = [
+                item.get('errors') if isinstance(item, dict) else None
+                for item in res_json
+            ]
+            errors = next((error for error in item_errors if error), None)
+            if errors:
+                return ApiResponseException(res, errors, item_errors)
+        elif isinstance(res_json, dict) and res_json.get('errors'):
+            return ApiResponseException(res, res_json['errors'])
+        return RequestFailedException(res)
+
+    @staticmethod
+    def _parse_response(res: Response, http_method: HTTPMethod,
+                        options: RequestConfig):
+        if http_method == HTTPMethod.DELETE:
+            return None
+
+        if not options.follow_redirects and res.is_redirect:
+            return res.headers.get('location', '')
+
+        if options.raw_response:
+            return res
+
+        content_type = res.headers.get('Content-Type', '')
+        if is_binary_content_type(content_type):
+            return res
+
+        if options.stream and 'json' in content_type:
+            return StreamingApiResponse(res)
+
+        try:
+            json_response = res.json()
+            return ApiResponse(res, json_response, options.keep_response)
+        except JSONDecodeError as exc:
+            raise ResponseParseException(exc, res)
@@ -0,0 +1,211 @@
+from collections import OrderedDict
+import re
+import shelve
+from threading import Lock
+from time import time
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+from requests import Response
+
+from .utils import build_response, make_request_key
+
+DEFAULT_CACHE_TTL = 0.0
+DEFAULT_CACHE_SIZE = 1024
+
+
+class CacheEntry:
+    __slots__ = ('url', 'status_code', 'headers', 'content', 'etag', 'expires_at')
+
+    def __init__(self, url: str, status_code: int, headers: dict,
+                 content: bytes, etag: Optional[str], expires_at: float) -> None:
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.etag = etag
+        self.expires_at = expires_at
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @property
+    def fresh(self) -> bool:
+        return time() < self.expires_at
+
+    def to_response(self) -> Response:
+        return build_response(self.status_code, self.headers, self.content, url=self.url)
+
+
+class MemoryCacheBackend:
+    """LRU-хранилище в памяти процесса"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self._maxsize = maxsize
+        self._entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def keys(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class ShelveCacheBackend:
+    """
+    Хранилище на диске (shelve), переживает перезапуск процесса.
+    Вытеснение LRU по индексу ключей в памяти; при открытии индекс
+    упорядочивается по времени истечения записей.
+    """
+
+    def __init__(self, path: str, maxsize: int = DEFAULT_CACHE_SIZE * 10) -> None:
+        self._maxsize = maxsize
+        self._shelf = shelve.open(path)
+        self._lock = Lock()
+        self._order: 'OrderedDict[str, None]' = OrderedDict(
+            (key, None) for key in sorted(self._shelf, key=lambda k: self._shelf[k].expires_at)
+        )
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._shelf.get(key)
+            if entry is not None:
+                self._order.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._shelf[key] = entry
+            self._order[key] = None
+            self._order.move_to_end(key)
+            while len(self._order) > self._maxsize:
+                oldest, _ = self._order.popitem(last=False)
+                del self._shelf[oldest]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if self._order.pop(key, False) is None:
+                del self._shelf[key]
+
+    def keys(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._order))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._shelf.clear()
+            self._order.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._shelf.close()
+
+
+class ResponseCache:
+    """
+    Кэш GET-ответов.
+    ttls задает время жизни по регулярному выражению для пути метода API,
+    например {r'entity/(currency|store)': 3600, r'entity/\\w+/metadata': 600}.
+    Остальные методы кэшируются на default_ttl, по умолчанию не кэшируются.
+    Устаревшие записи с ETag перепроверяются через If-None-Match.
+    """
+
+    def __init__(self, backend=None,
+                 default_ttl: float = DEFAULT_CACHE_TTL,
+                 ttls: Optional[Mapping[str, float]] = None) -> None:
+        self._backend = backend if backend is not None else MemoryCacheBackend()
+        self._default_ttl = default_ttl
+        self._ttls = [(re.compile(pattern), ttl) for pattern, ttl in (ttls or {}).items()]
+        self._lock = Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'invalidated': 0}
+
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += value
+
+    @staticmethod
+    def make_key(account: str, url: str, params: Mapping,
+                 headers: Optional[Mapping] = None, variant: Iterable = ()) -> str:
+        return make_request_key(account, url, params, headers, variant)
+
+    def get_ttl(self, api_method: str) -> float:
+        for pattern, ttl in self._ttls:
+            if pattern.match(api_method):
+                return ttl
+        return self._default_ttl
+
+    def lookup(self, key: str) -> Tuple[Optional[CacheEntry], bool]:
+        """Возвращает запись и признак ее свежести"""
+        entry = self._backend.get(key)
+        if entry is None:
+            self._count('misses')
+            return None, False
+        if entry.fresh:
+            self._count('hits')
+            return entry, True
+        self._count('misses')
+        return entry, False
+
+    def store(self, key: str, api_method: str, res: Response) -> None:
+        ttl = self.get_ttl(api_method)
+        if ttl <= 0 or res.status_code != 200:
+            return
+        self._backend.set(key, CacheEntry(
+            url=res.url,
+            status_code=res.status_code,
+            headers=dict(res.headers),
+            content=res.content,
+            etag=res.headers.get('ETag'),
+            expires_at=time() + ttl,
+        ))
+
+    def refresh(self, key: str, api_method: str, entry: CacheEntry) -> None:
+        self._count('revalidated')
+        entry.expires_at = time() + self.get_ttl(api_method)
+        self._backend.set(key, entry)
+
+    def invalidate(self, account: str, url_prefix: str) -> None:
+        """Удаляет все записи аккаунта, чей URL начинается с url_prefix"""
+        prefix = f'{account}@{url_prefix}'
+        count = 0
+        for key in self._backend.keys():
+            if key.startswith(prefix):
+                self._backend.delete(key)
+                count += 1
+        self._count('invalidated', count)
+
+    def clear(self) -> None:
+        self._backend.clear()
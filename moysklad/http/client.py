@@ -1,49 +1,116 @@
-from json import JSONDecodeError
-from time import sleep
-from typing import Optional, Union
+from collections import deque
+from copy import copy
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from hashlib import sha256
+from time import perf_counter, sleep
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
 from urllib.parse import urljoin
 
-from requests import HTTPError, Request, Session
-from requests.auth import HTTPBasicAuth
+from requests import ConnectionError as RequestsConnectionError
+from requests import HTTPError, Session
 
-from ..exceptions import (
-    ApiResponseException,
-    PosTokenException,
-    RequestFailedException,
-    ResponseParseException,
-)
-from ..queries import Query
-from .utils import DEBUG_RATE_HEADERS, ApiResponse, HTTPMethod, RequestConfig
+from ..queries import Query, Select
+from .base import BaseMoySkladHttpClient
+from .cache import ResponseCache
+from .metrics import RequestInfo, RequestObserver
+from .rate_limit import MAX_PARALLEL_REQUESTS, RATE_LIMIT_REMAINING_HEADER
+from .retry import RetryPolicy
+from .singleflight import SingleFlight
+from .stream import STREAM_CHUNK_SIZE
+from .transport import DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE, RequestsTransport, Transport
+from .utils import HTTPMethod, RequestConfig, make_request_key
 
-JSON_REQUEST_TYPES = (HTTPMethod.POST, HTTPMethod.PUT, HTTPMethod.DELETE)
 
-
-class MoySkladHttpClient:
+class MoySkladHttpClient(BaseMoySkladHttpClient):
     def __init__(
             self, login: str, password: str,
             pos_token: Optional[str] = None,
             version: str = '1.2',
             pos_version: str = '1.0',
+            pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+            pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+            pool_block: bool = False,
+            session: Optional[Session] = None,
+            transport: Optional[Transport] = None,
     ) -> None:
-        self._login = login
-        self._password = password
-        self._pos_token = pos_token
-        self._pre_request_sleep_time: float = 200
-        self._proxies = None
+        super().__init__(login, password, pos_token, version, pos_version)
+
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = RequestsTransport(
+                session=session,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block,
+            )
+        self._transport = transport
+        self._cache: Optional[ResponseCache] = None
+        self._observers: List[RequestObserver] = []
+        self._single_flight: Optional[SingleFlight] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
 
-        self._endpoint = f'https://api.moysklad.ru/api/remap/{version}/'
-        self._pos_endpoint = f'https://api.moysklad.ru/api/posap/{pos_version}/'
+    @property
+    def transport(self) -> Transport:
+        return self._transport
 
-    def set_pos_token(self, pos_token: str) -> None:
-        self._pos_token = pos_token
+    @property
+    def session(self) -> Session:
+        """
+        Общая сессия с пулом keep-alive соединений.
+        Есть только у транспорта RequestsTransport (по умолчанию).
+        """
+        return self._transport.session
 
     @property
-    def endpoint(self):
-        return self._endpoint
+    def cache(self) -> Optional[ResponseCache]:
+        return self._cache
+
+    def set_cache(self, cache: Optional[ResponseCache]) -> None:
+        self._cache = cache
+
+    def invalidate_cache(self, api_method: str, use_pos_api: bool = False) -> None:
+        """
+        Сбрасывает кэш коллекции сущности, к которой относится api_method.
+        api_method может быть и абсолютной ссылкой (meta.href).
+        """
+        if self._cache is None:
+            return
+        endpoint = self._pos_endpoint if use_pos_api else self._endpoint
+        collection = urljoin(endpoint, api_method).split('?', 1)[0]
+        for base in (self._endpoint, self._pos_endpoint):
+            if collection.startswith(base):
+                path = collection[len(base):]
+                collection = urljoin(base, '/'.join(path.split('/')[:2]))
+                break
+        self._cache.invalidate(self._login, f'{collection}?')
+        self._cache.invalidate(self._login, f'{collection}/')
 
     @property
-    def pos_endpoint(self):
-        return self._pos_endpoint
+    def single_flight(self) -> Optional[SingleFlight]:
+        return self._single_flight
+
+    def set_single_flight(self, single_flight: Optional[SingleFlight]) -> None:
+        """
+        Одновременные одинаковые GET-запросы выполняются один раз,
+        остальные вызовы получают тот же объект ответа.
+        """
+        self._single_flight = single_flight
+
+    def add_observer(self, observer: RequestObserver) -> None:
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: RequestObserver) -> None:
+        self._observers.remove(observer)
+
+    def close(self) -> None:
+        """Закрывает свой транспорт; переданный в конструктор транспорт не закрывается"""
+        if self._owns_transport:
+            self._transport.close()
 
     def get(self, method: str,
             data: Union[dict, list] = None,
@@ -93,13 +160,276 @@ class MoySkladHttpClient:
             query=query,
         )
 
-    def set_pre_request_timeout(self, ms: float) -> None:
-        self._pre_request_sleep_time = ms
+    def download(self, method: str, sink: Union[str, IO[bytes]],
+                 query: Optional[Query] = None,
+                 options: Optional[RequestConfig] = None,
+                 chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        """
+        Потоковая загрузка файла кусками в sink (путь или бинарный файл),
+        тело ответа целиком в памяти не держится. Возвращает число байт.
+        """
+        options = copy(options) if options else RequestConfig()
+        # тело отдается как есть при любом Content-Type, в том числе text/csv и json
+        options.stream = True
+        options.raw_response = True
+        res = self.get(method, query=query, options=options)
+
+        written = 0
+        try:
+            if isinstance(sink, str):
+                with open(sink, 'wb') as fp:
+                    for chunk in res.iter_content(chunk_size):
+                        written += fp.write(chunk)
+            else:
+                for chunk in res.iter_content(chunk_size):
+                    written += sink.write(chunk)
+        finally:
+            res.close()
+        return written
+
+    def download_many(self, downloads: Iterable[Tuple[str, Union[str, IO[bytes]]]],
+                      options: Optional[RequestConfig] = None,
+                      max_workers: int = MAX_PARALLEL_REQUESTS) -> list:
+        """
+        Параллельная загрузка пар (метод, sink) не более чем в max_workers потоков.
+        Для каждой пары возвращает число байт или исключение.
+        """
+        def download(item):
+            method, sink = item
+            try:
+                return self.download(method, sink, options=options)
+            except Exception as exc:  # pylint: disable=broad-except
+                return exc
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(download, downloads))
+
+    @staticmethod
+    def _get_page_window(query: Optional[Query]):
+        url_params = query.url_params if query else {}
+        limit = int(url_params.get('limit') or Select.MAX_LIST_LIMIT)
+        offset = int(url_params.get('offset') or 0)
+        return limit, offset
+
+    def _get_page(self, method: str, query: Optional[Query],
+                  options: Optional[RequestConfig], limit: int, offset: int):
+        return self.get(
+            method,
+            query=Query(query or Query(), {'limit': limit, 'offset': offset}),
+            options=options,
+        )
+
+    def iter_rows(self, method: str,
+                  query: Optional[Query] = None,
+                  options: Optional[RequestConfig] = None,
+                  prefetch: bool = True) -> Iterator[dict]:
+        """
+        Построчный обход списка с постраничной загрузкой.
+        Пока обрабатывается страница N, страница N+1 загружается в фоне,
+        поэтому в памяти находится не более двух страниц.
+        """
+        queries = self._split_query(method, query)
+        if len(queries) > 1:
+            for rows in self._iter_split_pages(method, queries, options):
+                yield from rows
+            return
+
+        limit, offset = self._get_page_window(query)
+
+        def fetch(page_offset):
+            return self._get_page(method, query, options, limit, page_offset)
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            response = fetch(offset)
+            while True:
+                rows = response.rows or []
+                meta = response.meta or {}
+                offset += limit
+                has_next = bool(rows) and 'nextHref' in meta
+                if has_next and meta.get('size') is not None:
+                    has_next = offset < meta['size']
+
+                next_page = None
+                if has_next and executor is not None:
+                    next_page = executor.submit(fetch, offset)
+
+                yield from rows
+                del rows, response
 
-    def set_proxies(self, proxies: Optional[dict]):
-        self._proxies = proxies
+                if not has_next:
+                    return
+                response = next_page.result() if next_page else fetch(offset)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def iter_pages_parallel(self, method: str,
+                            query: Optional[Query] = None,
+                            options: Optional[RequestConfig] = None,
+                            max_workers: int = MAX_PARALLEL_REQUESTS,
+                            ordered: bool = True) -> Iterator[List[dict]]:
+        """
+        Параллельная загрузка списка по страницам.
+        По meta.size первой страницы планируются все остальные окна
+        offset/limit, которые загружаются пулом из max_workers потоков.
+        Если meta.size нет, страницы загружаются последовательно по nextHref.
+        При ordered=False страницы отдаются по мере загрузки.
+        """
+        queries = self._split_query(method, query)
+        if len(queries) > 1:
+            yield from self._iter_split_pages(method, queries, options, max_workers, ordered)
+            return
+
+        limit, offset = self._get_page_window(query)
+        first_page = self._get_page(method, query, options, limit, offset)
+        rows = first_page.rows or []
+        meta = first_page.meta or {}
+        size = meta.get('size')
+        yield rows
+
+        if size is None:
+            # без meta.size окна заранее не известны, страницы
+            # загружаются последовательно по nextHref
+            while rows and 'nextHref' in meta:
+                offset += limit
+                page = self._get_page(method, query, options, limit, offset)
+                rows = page.rows or []
+                meta = page.meta or {}
+                if rows:
+                    yield rows
+            return
+        if not rows:
+            return
+
+        offsets = iter(range(offset + limit, size, limit))
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        pending = deque()
+
+        def submit():
+            page_offset = next(offsets, None)
+            if page_offset is not None:
+                pending.append(executor.submit(
+                    self._get_page, method, query, options, limit, page_offset,
+                ))
+
+        try:
+            for _ in range(max_workers * 2):
+                submit()
+            while pending:
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+                response = future.result()
+                submit()
+                yield response.rows or []
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def iter_rows_parallel(self, method: str,
+                           query: Optional[Query] = None,
+                           options: Optional[RequestConfig] = None,
+                           max_workers: int = MAX_PARALLEL_REQUESTS,
+                           ordered: bool = True) -> Iterator[dict]:
+        """Построчный вариант iter_pages_parallel"""
+        for rows in self.iter_pages_parallel(method, query, options, max_workers, ordered):
+            yield from rows
+
+    def _iter_split_pages(self, method: str, queries: List[Query],
+                          options: Optional[RequestConfig] = None,
+                          max_workers: int = MAX_PARALLEL_REQUESTS,
+                          ordered: bool = True) -> Iterator[List[dict]]:
+        """
+        Выполняет части запроса, разделенного по фильтру in_, параллельно
+        и отдает строки каждой части без повторов по id.
+        При ordered=True части отдаются в порядке queries.
+        """
+        def fetch(part):
+            return list(self.iter_rows(method, part, options, prefetch=False))
+
+        seen = set()
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = [executor.submit(fetch, part) for part in queries]
+        try:
+            for future in futures if ordered else as_completed(futures):
+                rows = []
+                for row in future.result():
+                    row_id = row.get('id') if isinstance(row, dict) else None
+                    if row_id is not None:
+                        if row_id in seen:
+                            continue
+                        seen.add(row_id)
+                    rows.append(row)
+                yield rows
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def fetch_all(self, method: str,
+                  query: Optional[Query] = None,
+                  options: Optional[RequestConfig] = None,
+                  max_workers: int = MAX_PARALLEL_REQUESTS) -> List[dict]:
+        return list(self.iter_rows_parallel(method, query, options, max_workers))
+
+    def _send(self, prepared, http_method: HTTPMethod,
+              options: RequestConfig,
+              retry_policy: Optional[RetryPolicy] = None,
+              info: Optional[RequestInfo] = None):
+        if retry_policy is not None:
+            retry_policy.count_request()
+
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                queued = self._rate_limiter.acquire()
+                if info is not None:
+                    info.queued += queued
+            if self._pre_request_sleep_time:
+                sleep(self._pre_request_sleep_time / 1000)
+                if info is not None:
+                    info.sleeping += self._pre_request_sleep_time / 1000
+
+            started = perf_counter()
+            try:
+                res = self._transport.send(
+                    prepared,
+                    allow_redirects=options.follow_redirects,
+                    stream=options.stream,
+                    proxies=self._proxies,
+                )
+            except RequestsConnectionError:
+                if retry_policy is None or not retry_policy.should_retry_connection_error(
+                        http_method, attempt):
+                    raise
+                backoff = retry_policy.get_backoff(attempt)
+            else:
+                if self._rate_limiter is not None:
+                    self._rate_limiter.update(res.headers)
+
+                if retry_policy is None or not retry_policy.should_retry_status(
+                        http_method, res.status_code, attempt):
+                    if info is not None:
+                        info.sending += perf_counter() - started
+                    return res
+
+                res.close()
+                backoff = retry_policy.get_backoff(attempt, res.headers)
+            finally:
+                if info is not None:
+                    info.retries = attempt
+
+            if info is not None:
+                info.sending += perf_counter() - started
+                info.sleeping += backoff
+            sleep(backoff)
+            attempt += 1
 
-    # pylint: disable-msg=too-many-locals
     def _make_request(
             self, http_method: HTTPMethod,
             api_method: str,
@@ -107,90 +437,133 @@ class MoySkladHttpClient:
             options: Optional[RequestConfig] = None,
             **kwargs,
     ):
-        if not data:
-            data = {}
         if not options:
             options = RequestConfig()
 
-        password = self._password
-        endpoint = self._endpoint
-
-        if options.use_pos_api:
-            if options.use_pos_token:
-                if not self._pos_token:
-                    raise PosTokenException('POS token is used, but it\'s invalid or empty')
-                password = self._pos_token
-            endpoint = self._pos_endpoint
-
-        auth = HTTPBasicAuth(self._login, password)
-
-        headers = {
-            'Accept-Encoding': 'gzip'
-        }
-        if options.format_millisecond:
-            headers['X-Lognex-Format-Millisecond'] = 'true'
-        if options.disable_webhooks_dispatch:
-            headers['X-Lognex-WebHook-Disable'] = 'true'
-        if options.debug_rate_limit:
-            headers.update(DEBUG_RATE_HEADERS)
-        if options.custom_headers:
-            headers.update(options.custom_headers)
-
-        query = kwargs.get('query') or Query()
-        request_payload = {
-            'method': http_method.value,
-            'url': urljoin(endpoint, api_method),
-            'headers': headers,
-            'auth': auth,
-            'params': query.url_params,
-        }
-
-        if not options.ignore_request_body:
-            if http_method == HTTPMethod.GET and isinstance(data, dict):
-                request_payload['params'].update(data)
-            elif http_method in JSON_REQUEST_TYPES:
-                request_payload['json'] = data
-            else:
-                raise NotImplementedError('Unsupported request type')
-
-        session = Session()
-        request = Request(**request_payload)
-        prepared = session.prepare_request(request)
+        if not self._observers:
+            return self._perform_request(
+                http_method, api_method, data, options, kwargs.get('query'),
+            )
 
+        info = RequestInfo(http_method, api_method)
+        started = perf_counter()
         try:
-            sleep(self._pre_request_sleep_time / 1000)
+            return self._perform_request(
+                http_method, api_method, data, options, kwargs.get('query'), info,
+            )
+        except Exception as exc:
+            info.error = exc
+            raise
+        finally:
+            info.total = perf_counter() - started
+            for observer in self._observers:
+                observer.on_request(info)
 
-            res = session.send(
-                request=prepared,
-                allow_redirects=options.follow_redirects,
-                proxies=self._proxies,
+    @staticmethod
+    def _get_request_variant(request_payload: dict, options: RequestConfig) -> tuple:
+        # ответ зависит и от учетных данных (пароль или токен POS),
+        # в ключ попадает только их хэш
+        secret = request_payload['auth'][1] or ''
+        return (
+            sha256(secret.encode()).hexdigest()[:16],
+            f'redirects={options.follow_redirects}',
+        )
+
+    # pylint: disable-msg=too-many-locals,too-many-branches
+    def _perform_request(
+            self, http_method: HTTPMethod,
+            api_method: str,
+            data: Optional[Union[dict, list]],
+            options: RequestConfig,
+            query: Optional[Query] = None,
+            info: Optional[RequestInfo] = None,
+    ):
+        request_payload = self._build_request(
+            http_method, api_method, data, options, query,
+        )
+
+        cache = None
+        cache_key = None
+        cache_entry = None
+        use_cache = options.use_cache and not options.stream
+        if self._cache is not None and use_cache and http_method == HTTPMethod.GET:
+            cache = self._cache
+            cache_key = cache.make_key(
+                self._login, request_payload['url'], request_payload['params'],
+                request_payload['headers'], self._get_request_variant(request_payload, options),
             )
-            res.raise_for_status()
-        except HTTPError as exc:
-            res = exc.response
-            e = RequestFailedException(res)
+            cache_entry, fresh = cache.lookup(cache_key)
+            if fresh:
+                if info is not None:
+                    info.cache_hit = True
+                    info.status_code = cache_entry.status_code
+                return self._parse_response(cache_entry.to_response(), http_method, options)
+            if cache_entry is not None and cache_entry.etag:
+                request_payload['headers']['If-None-Match'] = cache_entry.etag
 
-            try:
-                res_json = res.json()
-                is_list = isinstance(res_json, list)
-                errors = res_json[0].get('errors') if is_list else res_json.get('errors')
-                if errors:
-                    e = ApiResponseException(res, errors)
-            except JSONDecodeError:
-                pass
-            finally:
-                raise e from exc
+        def execute():
+            return self._execute(
+                request_payload, http_method, api_method, options, info,
+                cache, cache_key, cache_entry,
+            )
 
-        if http_method == HTTPMethod.DELETE:
-            return None
+        use_single_flight = (
+            self._single_flight is not None
+            and http_method == HTTPMethod.GET
+            and not options.stream
+        )
+        if not use_single_flight:
+            return execute()
+        # объединяются только запросы с одинаковым видом результата
+        key = make_request_key(
+            self._login, request_payload['url'], request_payload['params'],
+            request_payload['headers'],
+            self._get_request_variant(request_payload, options) + (
+                f'raw={options.raw_response}',
+                f'keep={options.keep_response}',
+            ),
+        )
+        return self._single_flight.do(key, execute)
 
-        if not options.follow_redirects and res.is_redirect:
-            return res.headers.get('location', '')
+    # pylint: disable-msg=too-many-arguments
+    def _execute(self, request_payload: dict, http_method: HTTPMethod,
+                 api_method: str, options: RequestConfig,
+                 info: Optional[RequestInfo], cache: Optional[ResponseCache],
+                 cache_key: Optional[str], cache_entry):
+        prepared = self._transport.prepare(request_payload)
+
+        retry_policy = options.retry_policy or self._retry_policy
+        res = self._send(prepared, http_method, options, retry_policy, info)
+
+        if info is not None:
+            info.status_code = res.status_code
+            info.bytes_sent = len(prepared.body or b'')
+            if options.stream:
+                info.bytes_received = int(res.headers.get('Content-Length') or 0)
+            else:
+                info.bytes_received = len(res.content)
+            remaining = res.headers.get(RATE_LIMIT_REMAINING_HEADER)
+            if remaining is not None and remaining.isdigit():
+                info.rate_limit_remaining = int(remaining)
 
         try:
-            json_response = res.json()
-            return ApiResponse(res, json_response)
-        except JSONDecodeError as exc:
-            if res.headers['Content-Type'] == 'application/octet-stream':
-                return res
-            raise ResponseParseException(exc, res)
+            res.raise_for_status()
+        except HTTPError as exc:
+            raise self._get_request_exception(exc.response) from exc
+
+        if cache is not None:
+            if cache_entry is not None and res.status_code == 304:
+                cache.refresh(cache_key, api_method, cache_entry)
+                res = cache_entry.to_response()
+            else:
+                cache.store(cache_key, api_method, res)
+        elif http_method != HTTPMethod.GET:
+            self.invalidate_cache(api_method, options.use_pos_api)
+
+        if info is None:
+            return self._parse_response(res, http_method, options)
+
+        started = perf_counter()
+        result = self._parse_response(res, http_method, options)
+        info.decoding = perf_counter() - started
+        return result
@@ -0,0 +1,179 @@
+from bisect import bisect_left
+from collections import defaultdict
+import re
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from .utils import HTTPMethod
+
+ID_MATCH = re.compile(
+    r'(?<=/)[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}(?=/|$)',
+)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def get_endpoint_template(api_method: str) -> str:
+    """entity/product/<uuid>/audit -> entity/product/{id}/audit"""
+    return ID_MATCH.sub('{id}', api_method.split('?', 1)[0])
+
+
+class RequestInfo:
+    """Замеры одного вызова клиента, время в секундах"""
+    __slots__ = (
+        'method', 'endpoint', 'status_code', 'bytes_sent', 'bytes_received',
+        'queued', 'sleeping', 'sending', 'decoding', 'total', 'retries',
+        'rate_limit_remaining', 'cache_hit', 'error',
+    )
+
+    def __init__(self, method: HTTPMethod, api_method: str) -> None:
+        self.method = method.value.upper()
+        self.endpoint = get_endpoint_template(api_method)
+        self.status_code: Optional[int] = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.queued = 0.0
+        self.sleeping = 0.0
+        self.sending = 0.0
+        self.decoding = 0.0
+        self.total = 0.0
+        self.retries = 0
+        self.rate_limit_remaining: Optional[int] = None
+        self.cache_hit = False
+        self.error: Optional[Exception] = None
+
+    def __str__(self):
+        return f'RequestInfo [{self.method} {self.endpoint} {self.status_code}]'
+
+
+class RequestObserver:
+    """Базовый наблюдатель, вызывается после завершения каждого запроса"""
+
+    def on_request(self, info: RequestInfo) -> None:
+        pass
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оценка квантиля по верхней границе корзины"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': dict(zip(self.buckets + (float('inf'),), self.counts)),
+        }
+
+
+class MetricsCollector(RequestObserver):
+    """
+    Счетчики и гистограммы по методу и шаблону эндпоинта.
+    snapshot() отдает словарь, to_prometheus() - текстовый формат Prometheus.
+    """
+    TIMINGS = ('total', 'queued', 'sleeping', 'sending', 'decoding')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self._buckets = buckets
+        self._lock = Lock()
+        self._requests: Dict[tuple, int] = defaultdict(int)
+        self._counters: Dict[tuple, float] = defaultdict(float)
+        self._histograms: Dict[tuple, Histogram] = {}
+        self._rate_limit_remaining: Optional[int] = None
+
+    def _histogram(self, key: tuple) -> Histogram:
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(self._buckets)
+        return histogram
+
+    def on_request(self, info: RequestInfo) -> None:
+        labels = (info.method, info.endpoint)
+        status = info.status_code or (type(info.error).__name__ if info.error else None)
+        with self._lock:
+            self._requests[labels + (status,)] += 1
+            self._counters[labels + ('bytes_sent',)] += info.bytes_sent
+            self._counters[labels + ('bytes_received',)] += info.bytes_received
+            self._counters[labels + ('retries',)] += info.retries
+            self._counters[labels + ('cache_hits',)] += int(info.cache_hit)
+            self._counters[labels + ('errors',)] += int(info.error is not None)
+            for timing in self.TIMINGS:
+                self._histogram(labels + (timing,)).observe(getattr(info, timing))
+            if info.rate_limit_remaining is not None:
+                self._rate_limit_remaining = info.rate_limit_remaining
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._counters.clear()
+            self._histograms.clear()
+            self._rate_limit_remaining = None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            endpoints: Dict[str, dict] = {}
+
+            def endpoint(method, name):
+                return endpoints.setdefault(f'{method} {name}', {
+                    'requests': {}, 'counters': {}, 'timings': {},
+                })
+
+            for (method, name, status), count in self._requests.items():
+                endpoint(method, name)['requests'][str(status)] = count
+            for (method, name, counter), value in self._counters.items():
+                endpoint(method, name)['counters'][counter] = value
+            for (method, name, timing), histogram in self._histograms.items():
+                endpoint(method, name)['timings'][timing] = dict(
+                    histogram.to_dict(),
+                    p50=histogram.quantile(0.5),
+                    p99=histogram.quantile(0.99),
+                )
+            return {
+                'endpoints': endpoints,
+                'rate_limit_remaining': self._rate_limit_remaining,
+            }
+
+    def to_prometheus(self, prefix: str = 'moysklad_client') -> str:
+        lines = []
+        with self._lock:
+            for (method, name, status), count in sorted(self._requests.items(), key=str):
+                lines.append(
+                    f'{prefix}_requests_total{{method="{method}",endpoint="{name}",'
+                    f'status="{status}"}} {count}'
+                )
+            for (method, name, counter), value in sorted(self._counters.items()):
+                lines.append(
+                    f'{prefix}_{counter}_total{{method="{method}",endpoint="{name}"}} {value}'
+                )
+            for (method, name, timing), histogram in sorted(self._histograms.items()):
+                labels = f'method="{method}",endpoint="{name}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else bound
+                    lines.append(
+                        f'{prefix}_{timing}_seconds_bucket{{{labels},le="{le}"}} {cumulative}'
+                    )
+                lines.append(f'{prefix}_{timing}_seconds_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'{prefix}_{timing}_seconds_count{{{labels}}} {histogram.count}')
+            if self._rate_limit_remaining is not None:
+                lines.append(f'{prefix}_rate_limit_remaining {self._rate_limit_remaining}')
+        return '\n'.join(lines) + '\n'
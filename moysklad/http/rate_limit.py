@@ -0,0 +1,133 @@
+from threading import Lock
+from time import monotonic, sleep
+from typing import Mapping, Optional
+from weakref import WeakValueDictionary
+
+
+RATE_LIMIT_HEADER = 'X-RateLimit-Limit'
+RATE_LIMIT_REMAINING_HEADER = 'X-RateLimit-Remaining'
+RATE_LIMIT_INTERVAL_HEADER = 'X-Lognex-Retry-TimeInterval'
+RATE_LIMIT_RESET_HEADER = 'X-Lognex-Reset'
+RATE_LIMIT_RETRY_AFTER_HEADER = 'X-Lognex-Retry-After'
+
+DEFAULT_RATE_LIMIT = 45
+DEFAULT_RATE_INTERVAL = 3.0
+MAX_PARALLEL_REQUESTS = 5
+
+
+def _header_number(headers: Mapping, name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Token bucket, подстраивающийся под заголовки ограничений МойСклад.
+    Один экземпляр на аккаунт, общий для всех потоков и клиентов.
+    Экземпляр живет, пока на него ссылается хотя бы один клиент.
+    """
+    _instances: 'WeakValueDictionary[str, RateLimiter]' = WeakValueDictionary()
+    _instances_lock = Lock()
+
+    def __init__(self, limit: int = DEFAULT_RATE_LIMIT,
+                 interval: float = DEFAULT_RATE_INTERVAL) -> None:
+        self._lock = Lock()
+        self._limit = float(limit)
+        self._interval = interval
+        self._tokens = float(limit)
+        self._updated_at = monotonic()
+        self._blocked_until = 0.0
+
+    @classmethod
+    def for_account(cls, login: str) -> 'RateLimiter':
+        with cls._instances_lock:
+            limiter = cls._instances.get(login)
+            if limiter is None:
+                limiter = cls._instances[login] = cls()
+            return limiter
+
+    @property
+    def limit(self) -> float:
+        return self._limit
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(monotonic())
+            return self._tokens
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            rate = self._limit / self._interval
+            self._tokens = min(self._limit, self._tokens + elapsed * rate)
+            self._updated_at = now
+
+    def _wait_time(self, now: float) -> float:
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) * self._interval / self._limit
+
+    def available_in(self) -> float:
+        """Время до появления свободного токена, без его занятия"""
+        with self._lock:
+            return self._wait_time(monotonic())
+
+    def reserve(self) -> float:
+        """Занимает токен, если он есть, иначе возвращает время ожидания"""
+        with self._lock:
+            delay = self._wait_time(monotonic())
+            if delay <= 0:
+                self._tokens -= 1
+            return delay
+
+    def acquire(self) -> float:
+        """Ждет свободный токен, возвращает время ожидания в секундах"""
+        waited = 0.0
+        while True:
+            delay = self.reserve()
+            if delay <= 0:
+                return waited
+            sleep(delay)
+            waited += delay
+
+    def update(self, headers: Mapping) -> None:
+        limit = _header_number(headers, RATE_LIMIT_HEADER)
+        interval = _header_number(headers, RATE_LIMIT_INTERVAL_HEADER)
+        remaining = _header_number(headers, RATE_LIMIT_REMAINING_HEADER)
+        reset = _header_number(headers, RATE_LIMIT_RESET_HEADER)
+        retry_after = _header_number(headers, RATE_LIMIT_RETRY_AFTER_HEADER)
+
+        with self._lock:
+            now = monotonic()
+            self._refill(now)
+            if limit and limit > 0:
+                self._limit = limit
+            if interval and interval > 0:
+                self._interval = interval / 1000
+            if remaining is not None:
+                self._tokens = min(self._tokens, remaining, self._limit)
+                if remaining <= 0 and reset:
+                    self._block(now + reset / 1000, self._limit)
+            if retry_after:
+                self._block(now + retry_after / 1000, 1.0)
+
+    def _block(self, until: float, tokens: float) -> None:
+        # до момента until запросы не выпускаются, после него в бюджете
+        # остается tokens токенов
+        if until > self._blocked_until:
+            self._blocked_until = until
+            self._tokens = tokens
+            self._updated_at = until
@@ -0,0 +1,90 @@
+from random import uniform
+from threading import Lock
+from typing import Dict, Iterable, Mapping, Optional
+
+from .rate_limit import RATE_LIMIT_RETRY_AFTER_HEADER
+from .utils import HTTPMethod
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = (HTTPMethod.GET, HTTPMethod.PUT, HTTPMethod.DELETE)
+
+
+class RetryPolicy:
+    """
+    Политика повторов для 429, 5xx и обрывов соединения.
+    Пауза берется из X-Lognex-Retry-After, иначе экспоненциальная с jitter.
+    """
+
+    def __init__(
+            self, total: int = 3,
+            backoff_factor: float = 0.5,
+            backoff_max: float = 30.0,
+            statuses: Iterable[int] = RETRY_STATUSES,
+            methods: Iterable[HTTPMethod] = IDEMPOTENT_METHODS,
+            retry_connection_errors: bool = True,
+    ) -> None:
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(methods)
+        self.retry_connection_errors = retry_connection_errors
+
+        self._lock = Lock()
+        self._stats = {
+            'requests': 0,
+            'retries': 0,
+            'retries_status': 0,
+            'retries_connection': 0,
+            'exhausted': 0,
+        }
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._stats[key] += 1
+
+    def count_request(self) -> None:
+        self._count('requests')
+
+    def can_retry(self, method: HTTPMethod, attempt: int) -> bool:
+        return method in self.methods and attempt < self.total
+
+    def should_retry_status(self, method: HTTPMethod, status: int,
+                            attempt: int) -> bool:
+        if status not in self.statuses:
+            return False
+        if not self.can_retry(method, attempt):
+            self._count('exhausted')
+            return False
+        self._count('retries', 'retries_status')
+        return True
+
+    def should_retry_connection_error(self, method: HTTPMethod,
+                                      attempt: int) -> bool:
+        if not self.retry_connection_errors:
+            return False
+        if not self.can_retry(method, attempt):
+            self._count('exhausted')
+            return False
+        self._count('retries', 'retries_connection')
+        return True
+
+    def get_backoff(self, attempt: int,
+                    headers: Optional[Mapping] = None) -> float:
+        """Пауза перед повтором номер attempt (с нуля), в секундах"""
+        if headers:
+            retry_after = headers.get(RATE_LIMIT_RETRY_AFTER_HEADER)
+            if retry_after:
+                try:
+                    return float(retry_after) / 1000
+                except ValueError:
+                    pass
+        backoff = min(self.backoff_max, self.backoff_factor * 2 ** attempt)
+        return uniform(0, backoff)
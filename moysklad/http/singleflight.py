@@ -0,0 +1,58 @@
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self) -> None:
+        self.done = Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых вызовов.
+    Пока вызов с ключом key выполняется, остальные вызовы с тем же ключом
+    ждут и получают его результат или исключение.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._stats = {'calls': 0, 'shared': 0}
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._stats['calls'] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+                self._stats['shared'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+            return flight.result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
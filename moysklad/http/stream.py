@@ -0,0 +1,177 @@
+from codecs import getincrementaldecoder
+from collections import deque
+from json import JSONDecodeError, JSONDecoder
+from typing import Iterator, Tuple
+
+from requests import Response
+
+STREAM_CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+
+
+class _JsonReader:
+    """Буфер поверх потока байт, из которого значения JSON читаются по одному"""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._text_decoder = getincrementaldecoder('utf-8')()
+        self._json_decoder = JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _read(self) -> bool:
+        if self._eof:
+            return False
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            self._buffer += self._text_decoder.decode(b'', final=True)
+        else:
+            self._buffer += self._text_decoder.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        """Следующий значимый символ без его извлечения"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                raise JSONDecodeError('Unexpected end of stream', self._buffer, self._pos)
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise JSONDecodeError(f'Expecting {char!r}', self._buffer, self._pos)
+        self._pos += 1
+
+    def skip(self, char: str) -> bool:
+        if self.peek() == char:
+            self._pos += 1
+            return True
+        return False
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+            except JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # число на границе буфера может продолжаться в следующем куске
+            is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if is_number and end == len(self._buffer) and self._read():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_json_events(chunks: Iterator[bytes]) -> Iterator[Tuple[str, object]]:
+    """
+    Разбирает ответ-список по мере чтения.
+    Отдает ('row', строка) для каждого элемента rows (или корневого массива)
+    и (ключ, значение) для остальных полей корневого объекта.
+    """
+    reader = _JsonReader(chunks)
+
+    def iter_array():
+        reader.expect('[')
+        if reader.skip(']'):
+            return
+        while True:
+            yield 'row', reader.decode()
+            if reader.skip(']'):
+                return
+            reader.expect(',')
+
+    if reader.peek() == '[':
+        yield from iter_array()
+        return
+
+    reader.expect('{')
+    if reader.skip('}'):
+        return
+    while True:
+        key = reader.decode()
+        reader.expect(':')
+        if key == 'rows' and reader.peek() == '[':
+            yield from iter_array()
+        else:
+            yield key, reader.decode()
+        if reader.skip('}'):
+            return
+        reader.expect(',')
+
+
+class StreamingApiResponse:
+    """
+    Ответ, строки которого разбираются прямо из сетевого потока.
+    meta и context доступны сразу, т.к. МойСклад отдает их перед rows.
+    """
+
+    def __init__(self, response: Response,
+                 chunk_size: int = STREAM_CHUNK_SIZE) -> None:
+        self.response = response
+        self.headers = response.headers
+        self._events = iter_json_events(response.iter_content(chunk_size))
+        self._fields = {}
+        self._rows = deque()
+        self._done = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _pull(self) -> bool:
+        if self._done:
+            return False
+        event = next(self._events, None)
+        if event is None:
+            self._done = True
+            self.close()
+            return False
+        key, value = event
+        if key == 'row':
+            self._rows.append(value)
+        else:
+            self._fields[key] = value
+        return True
+
+    def _get_field(self, name: str):
+        # поле, идущее после rows, потребует буферизации строк
+        while name not in self._fields and self._pull():
+            pass
+        return self._fields.get(name)
+
+    @property
+    def meta(self):
+        return self._get_field('meta')
+
+    @property
+    def context(self):
+        return self._get_field('context')
+
+    def __iter__(self):
+        while True:
+            if self._rows:
+                yield self._rows.popleft()
+            elif not self._pull():
+                return
+
+    @property
+    def rows(self) -> Iterator[dict]:
+        return iter(self)
+
+    def close(self) -> None:
+        self.response.close()
+
+    def __str__(self):
+        return f'StreamingApiResponse [{self.response.status_code}]'
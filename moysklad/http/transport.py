@@ -0,0 +1,243 @@
+import json
+from abc import ABC, abstractmethod
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from requests import ConnectionError as RequestsConnectionError
+from requests import PreparedRequest, Request, Response, Session, Timeout
+from requests.adapters import HTTPAdapter
+
+from .utils import build_response
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+class Transport(ABC):
+    """
+    Отправка подготовленных запросов клиента.
+    Любой транспорт возвращает requests.Response, а ошибки соединения
+    выбрасывает как requests.ConnectionError, поэтому сборка запросов,
+    повторы, разбор ответов и ошибок от транспорта не зависят.
+    """
+
+    def prepare(self, request_payload: dict) -> PreparedRequest:
+        return Request(**request_payload).prepare()
+
+    @abstractmethod
+    def send(self, prepared: PreparedRequest,
+             allow_redirects: bool = True,
+             stream: bool = False,
+             proxies: Optional[dict] = None) -> Response:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class RequestsTransport(Transport):
+    """Транспорт на requests.Session с пулом keep-alive соединений (HTTP/1.1)"""
+
+    def __init__(self, session: Optional[Session] = None,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 pool_block: bool = False) -> None:
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self._session = session
+        self._owns_session = session is None
+        self._session_lock = Lock()
+
+    @property
+    def session(self) -> Session:
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> Session:
+        session = Session()
+        adapter = HTTPAdapter(
+            pool_connections=self._pool_connections,
+            pool_maxsize=self._pool_maxsize,
+            pool_block=self._pool_block,
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def prepare(self, request_payload: dict) -> PreparedRequest:
+        return self.session.prepare_request(Request(**request_payload))
+
+    def send(self, prepared: PreparedRequest,
+             allow_redirects: bool = True,
+             stream: bool = False,
+             proxies: Optional[dict] = None) -> Response:
+        return self.session.send(
+            request=prepared,
+            allow_redirects=allow_redirects,
+            proxies=proxies,
+            stream=stream,
+        )
+
+    def close(self) -> None:
+        """Закрывает свою сессию; переданная в конструктор сессия не закрывается"""
+        with self._session_lock:
+            if self._session is not None and self._owns_session:
+                self._session.close()
+                self._session = None
+
+
+class _HttpxStream:
+    """Файлоподобная обертка потокового ответа httpx для Response.raw"""
+
+    def __init__(self, response) -> None:
+        self._response = response
+        self._chunks = None
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        if self._chunks is None:
+            self._chunks = self._response.iter_bytes(amt)
+        return next(self._chunks, b'')
+
+    def close(self) -> None:
+        self._response.close()
+
+    release_conn = close
+
+
+class HttpxTransport(Transport):
+    """
+    Транспорт на httpx, по умолчанию с HTTP/2: параллельные запросы из
+    разных потоков мультиплексируются в одном соединении.
+    Cookies не сохраняются, поэтому транспорт можно делить между аккаунтами.
+    """
+
+    def __init__(self, http2: bool = True,
+                 max_connections: int = DEFAULT_POOL_MAXSIZE,
+                 timeout: Optional[float] = None) -> None:
+        if httpx is None:
+            raise ImportError(
+                'httpx is required for HttpxTransport, '
+                'install fs-moysklad-api[http2]'
+            )
+        self._http2 = http2
+        self._max_connections = max_connections
+        self._timeout = timeout
+        self._clients: Dict[Optional[str], 'httpx.Client'] = {}
+        self._lock = Lock()
+
+    def _get_client(self, proxy: Optional[str]) -> 'httpx.Client':
+        client = self._clients.get(proxy)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(proxy)
+                if client is None:
+                    client = self._clients[proxy] = httpx.Client(
+                        http2=self._http2,
+                        proxy=proxy,
+                        timeout=self._timeout,
+                        limits=httpx.Limits(max_connections=self._max_connections),
+                        cookies=CookieJar(DefaultCookiePolicy(allowed_domains=[])),
+                    )
+        return client
+
+    def send(self, prepared: PreparedRequest,
+             allow_redirects: bool = True,
+             stream: bool = False,
+             proxies: Optional[dict] = None) -> Response:
+        proxy = (proxies or {}).get(urlparse(prepared.url).scheme)
+        client = self._get_client(proxy)
+        request = client.build_request(
+            prepared.method, prepared.url,
+            headers=dict(prepared.headers),
+            content=prepared.body,
+        )
+        try:
+            res = client.send(request, follow_redirects=allow_redirects, stream=stream)
+        except httpx.TimeoutException as exc:
+            raise Timeout(exc, request=prepared) from exc
+        except httpx.TransportError as exc:
+            raise RequestsConnectionError(exc, request=prepared) from exc
+
+        if stream:
+            response = build_response(
+                res.status_code, res.headers, b'', str(res.url), res.reason_phrase,
+            )
+            response._content = False  # pylint: disable=protected-access
+            response._content_consumed = False  # pylint: disable=protected-access
+            response.raw = _HttpxStream(res)
+        else:
+            response = build_response(
+                res.status_code, res.headers, res.content, str(res.url), res.reason_phrase,
+            )
+        response.request = prepared
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+FakeHandler = Callable[[PreparedRequest], Response]
+
+
+class FakeTransport(Transport):
+    """
+    Транспорт без сети для тестов и бенчмарков.
+    Ответы задаются по методу и окончанию пути, все запросы
+    сохраняются в requests. Без подходящего ответа - 404.
+    """
+
+    def __init__(self) -> None:
+        self._routes: List[Tuple[str, str, FakeHandler]] = []
+        self._lock = Lock()
+        self.requests: List[PreparedRequest] = []
+
+    def add_handler(self, method: str, path: str, handler: FakeHandler) -> None:
+        self._routes.insert(0, (method.upper(), '/' + path.strip('/'), handler))
+
+    def add_response(self, method: str, path: str,
+                     json_data=None,
+                     status_code: int = 200,
+                     headers: Optional[dict] = None,
+                     content: Optional[bytes] = None) -> None:
+        if content is None:
+            content = json.dumps(json_data).encode()
+            headers = {'Content-Type': 'application/json;charset=utf-8', **(headers or {})}
+
+        def handler(prepared: PreparedRequest) -> Response:
+            return build_response(status_code, headers or {}, content, prepared.url)
+
+        self.add_handler(method, path, handler)
+
+    def send(self, prepared: PreparedRequest,
+             allow_redirects: bool = True,
+             stream: bool = False,
+             proxies: Optional[dict] = None) -> Response:
+        with self._lock:
+            self.requests.append(prepared)
+        path = urlparse(prepared.url).path.rstrip('/')
+        for method, route, handler in self._routes:
+            if method == prepared.method and path.endswith(route):
+                response = handler(prepared)
+                break
+        else:
+            response = build_response(
+                404, {'Content-Type': 'application/json'},
+                json.dumps({'errors': [{'error': 'Not found', 'code': 1005}]}).encode(),
+                prepared.url,
+            )
+        response.request = prepared
+        return response
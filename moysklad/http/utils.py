@@ -1,7 +1,17 @@
 from enum import Enum
-from typing import Optional
+from typing import Iterable, Mapping, Optional
+from urllib.parse import urlencode
 
 from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from .rate_limit import (
+    RATE_LIMIT_HEADER,
+    RATE_LIMIT_INTERVAL_HEADER,
+    RATE_LIMIT_REMAINING_HEADER,
+    RATE_LIMIT_RESET_HEADER,
+    RATE_LIMIT_RETRY_AFTER_HEADER,
+)
 
 
 DEBUG_RATE_HEADERS = {
@@ -13,6 +23,68 @@ DEBUG_RATE_HEADERS = {
 }
 
 
+def build_response(status_code: int, headers: Mapping, content: bytes,
+                   url: str = '', reason: Optional[str] = None,
+                   encoding: Optional[str] = None) -> Response:
+    """Собирает requests.Response из уже прочитанного ответа"""
+    response = Response()
+    response.status_code = status_code
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = url
+    response.encoding = encoding
+    response._content = content  # pylint: disable=protected-access
+    response._content_consumed = True  # pylint: disable=protected-access
+    return response
+
+
+LEAN_RESPONSE_HEADERS = frozenset(name.lower() for name in (
+    RATE_LIMIT_HEADER,
+    RATE_LIMIT_REMAINING_HEADER,
+    RATE_LIMIT_INTERVAL_HEADER,
+    RATE_LIMIT_RESET_HEADER,
+    RATE_LIMIT_RETRY_AFTER_HEADER,
+    'Content-Type',
+    'ETag',
+    'Location',
+))
+
+
+BINARY_CONTENT_TYPES = (
+    'application/msword',
+    'application/octet-stream',
+    'application/pdf',
+    'application/vnd.',
+    'application/zip',
+    'image/',
+)
+
+
+def is_binary_content_type(content_type: str) -> bool:
+    return content_type.lower().startswith(BINARY_CONTENT_TYPES)
+
+
+def make_request_key(account: str, url: str, params: Mapping,
+                     headers: Optional[Mapping] = None,
+                     variant: Iterable = ()) -> str:
+    """
+    Канонический ключ GET-запроса: аккаунт, URL, отсортированные параметры,
+    заголовки и прочие признаки запроса (variant), влияющие на ответ
+    """
+    normalized = sorted(
+        (str(name), str(value))
+        for name, value in params.items()
+        if value is not None
+    )
+    key = f'{account}@{url}?{urlencode(normalized)}'
+    if headers:
+        key += '#' + urlencode(sorted((str(name).lower(), str(value))
+                                      for name, value in headers.items()))
+    for part in variant:
+        key += f'|{part}'
+    return key
+
+
 class HTTPMethod(Enum):
     GET = 'get'
     POST = 'post'
@@ -21,23 +93,45 @@ class HTTPMethod(Enum):
 
 
 class ApiResponse:
-    def __init__(self, response: Response, json_response: dict) -> None:
+    __slots__ = ('data', 'rows', 'status_code', 'headers', 'response')
+
+    def __init__(self, response: Response, json_response: dict,
+                 keep_response: bool = True) -> None:
         self.data = json_response
 
         if isinstance(json_response, dict):
-            self.context = json_response.get('context')
-            self.meta = json_response.get('meta')
             self.rows = json_response.get('rows')
         else:
-            self.context = None
-            self.meta = None
             self.rows = json_response
 
-        self.response = response
-        self.headers = response.headers
+        self.status_code = response.status_code
+        if keep_response:
+            self.response = response
+            self.headers = response.headers
+        else:
+            # исходный Response с телом ответа не удерживается,
+            # остаются только служебные заголовки
+            self.response = None
+            self.headers = CaseInsensitiveDict({
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() in LEAN_RESPONSE_HEADERS
+            })
+
+    @property
+    def meta(self) -> Optional[dict]:
+        if isinstance(self.data, dict):
+            return self.data.get('meta')
+        return None
+
+    @property
+    def context(self) -> Optional[dict]:
+        if isinstance(self.data, dict):
+            return self.data.get('context')
+        return None
 
     def __str__(self):
-        return f'ApiResponse [{self.response.status_code}]'
+        return f'ApiResponse [{self.status_code}]'
 
 
 class RequestConfig:
@@ -50,6 +144,11 @@ class RequestConfig:
             debug_rate_limit: bool = False,
             disable_webhooks_dispatch: bool = True,
             custom_headers: Optional[dict] = None,
+            retry_policy=None,
+            use_cache: bool = True,
+            stream: bool = False,
+            keep_response: bool = True,
+            raw_response: bool = False,
     ) -> None:
         self.use_pos_api = use_pos_api
         self.use_pos_token = use_pos_token
@@ -59,3 +158,8 @@ class RequestConfig:
         self.debug_rate_limit = debug_rate_limit
         self.disable_webhooks_dispatch = disable_webhooks_dispatch
         self.custom_headers = custom_headers
+        self.retry_policy = retry_policy
+        self.use_cache = use_cache
+        self.stream = stream
+        self.keep_response = keep_response
+        self.raw_response = raw_response
@@ -0,0 +1,209 @@
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from http.cookiejar import DefaultCookiePolicy
+from threading import Condition, Thread
+from time import monotonic
+from typing import Callable, Deque, Optional, Tuple
+from zlib import crc32
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from .http import MoySkladHttpClient, RequestsTransport, Transport
+from .http.rate_limit import MAX_PARALLEL_REQUESTS
+
+DEFAULT_MAX_TENANTS = 256
+DEFAULT_IDLE_TTL = 600.0
+DEFAULT_POOL_WORKERS = 32
+
+
+class _Tenant:
+    __slots__ = ('client', 'jobs', 'in_flight', 'last_used')
+
+    def __init__(self, client: MoySkladHttpClient) -> None:
+        self.client = client
+        self.jobs: Deque[Tuple[Future, Callable, tuple, dict]] = deque()
+        self.in_flight = 0
+        self.last_used = monotonic()
+
+    @property
+    def idle(self) -> bool:
+        return not self.jobs and not self.in_flight
+
+    def wait_time(self) -> float:
+        limiter = self.client.rate_limiter
+        return limiter.available_in() if limiter is not None else 0.0
+
+
+class ClientPool:
+    """
+    Клиенты множества аккаунтов с общим пулом соединений.
+    У каждого аккаунта свой бюджет запросов (RateLimiter.for_account),
+    очереди аккаунтов обслуживаются по кругу общим набором потоков:
+    поток не засыпает на лимите одного аккаунта, пока другие могут работать.
+    Простаивающие клиенты вытесняются по idle_ttl и сверх max_tenants (LRU);
+    RateLimiter аккаунта освобождается, когда у него не остается клиентов.
+    Вместо общей сессии можно передать свой transport, например HttpxTransport.
+    """
+
+    def __init__(self, max_tenants: int = DEFAULT_MAX_TENANTS,
+                 idle_ttl: float = DEFAULT_IDLE_TTL,
+                 max_workers: int = DEFAULT_POOL_WORKERS,
+                 max_parallel_per_tenant: int = MAX_PARALLEL_REQUESTS,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = DEFAULT_POOL_WORKERS,
+                 transport: Optional[Transport] = None) -> None:
+        self._max_tenants = max_tenants
+        self._idle_ttl = idle_ttl
+        self._max_parallel = max_parallel_per_tenant
+        self._session: Optional[Session] = None
+        if transport is None:
+            self._session = self._create_session(pool_connections, pool_maxsize)
+            transport = RequestsTransport(session=self._session)
+        self._transport = transport
+        self._tenants: 'OrderedDict[int, _Tenant]' = OrderedDict()
+        self._ready: Deque[int] = deque()
+        self._condition = Condition()
+        self._closed = False
+        self._next_eviction = monotonic() + idle_ttl
+        self._workers = [
+            Thread(target=self._work, daemon=True) for _ in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @staticmethod
+    def _create_session(pool_connections: int, pool_maxsize: int) -> Session:
+        session = Session()
+        # сессия общая для всех аккаунтов, cookies одного аккаунта
+        # не должны попадать в запросы другого
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @staticmethod
+    def _get_key(login: str, password: str) -> int:
+        return crc32(f'{login}{password}'.encode()) & 0xffffffff
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._tenants)
+
+    def get_client(self, login: str, password: str,
+                   pos_token: Optional[str] = None) -> MoySkladHttpClient:
+        with self._condition:
+            return self._get_tenant(login, password, pos_token).client
+
+    def _get_tenant(self, login: str, password: str,
+                    pos_token: Optional[str]) -> _Tenant:
+        key = self._get_key(login, password)
+        tenant = self._tenants.get(key)
+        if tenant is None:
+            self._evict(reserve=1)
+            client = MoySkladHttpClient(login, password, pos_token, transport=self._transport)
+            tenant = self._tenants[key] = _Tenant(client)
+        else:
+            self._tenants.move_to_end(key)
+            if pos_token is not None:
+                tenant.client.set_pos_token(pos_token)
+        tenant.last_used = monotonic()
+        return tenant
+
+    def _evict(self, reserve: int = 0) -> None:
+        now = monotonic()
+        self._next_eviction = now + self._idle_ttl
+        expired_at = now - self._idle_ttl
+        excess = len(self._tenants) - self._max_tenants + reserve
+        for key, tenant in list(self._tenants.items()):
+            if not tenant.idle:
+                continue
+            if tenant.last_used < expired_at or excess > 0:
+                del self._tenants[key]
+                excess -= 1
+
+
+    def submit(self, login: str, password: str, func: Callable,
+               *args, pos_token: Optional[str] = None, **kwargs) -> Future:
+        """
+        Ставит вызов func(client, *args, **kwargs) в очередь аккаунта.
+        Например: pool.submit(login, password, MoySkladHttpClient.get, 'entity/product')
+        """
+        if self._closed:
+            raise RuntimeError('ClientPool is closed')
+        future = Future()
+        with self._condition:
+            key = self._get_key(login, password)
+            tenant = self._get_tenant(login, password, pos_token)
+            if not tenant.jobs:
+                self._ready.append(key)
+            tenant.jobs.append((future, func, args, kwargs))
+            self._condition.notify()
+        return future
+
+    def _next_job(self):
+        # обход аккаунтов с очередью по кругу; возвращает задачу или
+        # время до ближайшего освобождения лимита
+        delay = None
+        for _ in range(len(self._ready)):
+            key = self._ready[0]
+            self._ready.rotate(-1)
+            tenant = self._tenants[key]
+            if tenant.in_flight >= self._max_parallel:
+                continue
+            wait = tenant.wait_time()
+            if wait > 0:
+                delay = wait if delay is None else min(delay, wait)
+                continue
+            job = tenant.jobs.popleft()
+            if not tenant.jobs:
+                self._ready.remove(key)
+            tenant.in_flight += 1
+            return tenant, job, None
+        return None, None, delay
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed and not self._ready:
+                        return
+                    if monotonic() >= self._next_eviction:
+                        self._evict()
+                    tenant, job, delay = self._next_job()
+                    if tenant is not None:
+                        break
+                    timeout = max(self._next_eviction - monotonic(), 0)
+                    self._condition.wait(timeout if delay is None else min(delay, timeout))
+
+            future, func, args, kwargs = job
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(tenant.client, *args, **kwargs))
+                except BaseException as exc:  # pylint: disable=broad-except
+                    future.set_exception(exc)
+
+            with self._condition:
+                tenant.in_flight -= 1
+                tenant.last_used = monotonic()
+                self._condition.notify_all()
+
+    def close(self, wait: bool = True) -> None:
+        """Выполняет оставшиеся задачи (при wait=True) и закрывает транспорт"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        self._tenants.clear()
+        self._transport.close()
+        if self._session is not None:
+            self._session.close()
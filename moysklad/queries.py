@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Optional, Union
+from math import ceil
+from typing import Callable, List, Optional, Union
 
 from .utils import get_time_string
 
@@ -10,9 +11,12 @@ from .utils import get_time_string
 class Query:
     def __init__(self, *args) -> None:
         self._url_params = {}
+        self._filter: Optional[Filter] = None
         for query in args:
             if isinstance(query, BaseQuery):
                 self._url_params[query.name] = query.get_raw()
+                if isinstance(query, Filter):
+                    self._filter = query
             elif isinstance(query, Select):
                 self._url_params.update(query.spec)
             elif isinstance(query, dict):
@@ -22,24 +26,78 @@ class Query:
                 self._url_params[query_name] = query_value
             elif isinstance(query, Query):
                 self._url_params.update(query.url_params)
+                self._filter = query._filter or self._filter
             else:
                 raise NotImplementedError('Unsupported filter type')
+        self._cache_key = None
 
     @property
     def url_params(self):
         return self._url_params
 
+    @property
+    def cache_key(self) -> tuple:
+        """Канонический неизменяемый ключ запроса, не зависит от порядка параметров"""
+        if self._cache_key is None:
+            self._cache_key = tuple(sorted(
+                (str(name), str(value))
+                for name, value in self._url_params.items()
+                if value is not None
+            ))
+        return self._cache_key
+
+    def split(self, fits: Callable[[Query], bool]) -> List[Query]:
+        """
+        Делит запрос по самому длинному списку Filter.in_, пока каждая
+        часть не станет удовлетворять fits (например, лимиту длины URL).
+        Объединение строк всех частей равно результату исходного запроса.
+        """
+        if self._filter is None or fits(self):
+            return [self]
+        parts = self._filter.split_in()
+        if len(parts) < 2:
+            return [self]
+        queries = []
+        for part in parts:
+            queries.extend(Query(self, part).split(fits))
+        return queries
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Query):
+            return NotImplemented
+        return self.cache_key == other.cache_key
+
+    def __hash__(self) -> int:
+        return hash(self.cache_key)
+
 
 class BaseQuery(ABC):
+    """
+    Условия хранятся в порядке добавления без повторов, поэтому строка
+    запроса одинакова между процессами. Собранная строка кэшируется
+    до следующего изменения.
+    """
     name = 'base'
 
     def __init__(self):
         self._query_buffer = []
+        self._raw = None
+
+    def _add(self, query: str):
+        if query not in self._query_buffer:
+            self._query_buffer.append(query)
+            self._raw = None
+        return self
 
     @abstractmethod
-    def get_raw(self) -> str:
+    def _compile(self) -> str:
         raise NotImplementedError
 
+    def get_raw(self) -> str:
+        if self._raw is None:
+            self._raw = self._compile()
+        return self._raw
+
     def get_buffer(self):
         return set(self._query_buffer)
 
@@ -55,66 +113,91 @@ class Filter(BaseQuery):
     """
     name = 'filter'
 
+    def __init__(self):
+        super().__init__()
+        self._in_values = {}
+
     def eq(self, field, value):
-        self._query_buffer.append(f'{field}={value}')
-        return self
+        return self._add(f'{field}={value}')
 
     def neq(self, field, value):
-        self._query_buffer.append(f'{field}!={value}')
-        return self
+        return self._add(f'{field}!={value}')
 
     def gt(self, field, value):
-        self._query_buffer.append(f'{field}>{value}')
-        return self
+        return self._add(f'{field}>{value}')
 
     def lt(self, field, value):
-        self._query_buffer.append(f'{field}<{value}')
-        return self
+        return self._add(f'{field}<{value}')
 
     def gte(self, field, value):
-        self._query_buffer.append(f'{field}>={value}')
-        return self
+        return self._add(f'{field}>={value}')
 
     def lte(self, field, value):
-        self._query_buffer.append(f'{field}<={value}')
-        return self
+        return self._add(f'{field}<={value}')
 
     def like(self, field, value):
-        self._query_buffer.append(f'{field}~{value}')
-        return self
+        return self._add(f'{field}~{value}')
 
     def st(self, field, value):
-        self._query_buffer.append(f'{field}~={value}')
-        return self
+        return self._add(f'{field}~={value}')
 
     def et(self, field, value):
-        self._query_buffer.append(f'{field}=~{value}')
-        return self
+        return self._add(f'{field}=~{value}')
 
     def in_(self, field, values):
+        values = list(values)
         equals = [f'{field}={value}' for value in values]
-        self._query_buffer.append(f';'.join(equals))
-        return self
+        query = ';'.join(equals)
+        self._in_values[query] = (field, values)
+        return self._add(query)
 
     def nin_(self, field, values):
         equals = [f'{field}!={value}' for value in values]
-        self._query_buffer.append(f';'.join(equals))
-        return self
+        return self._add(f';'.join(equals))
 
     def exists(self, field, exists=True):
         operator = '!=' if exists else '='
-        self._query_buffer.append(f'{field}{operator}')
-        return self
+        return self._add(f'{field}{operator}')
 
-    def get_raw(self):
-        return ';'.join(set(self._query_buffer))
+    def _compile(self):
+        return ';'.join(self._query_buffer)
 
     def __add__(self, other: Filter):
-        queries = set(self._query_buffer) ^ set(other._query_buffer)
+        queries = [query for query in self._query_buffer if query not in other._query_buffer]
+        queries += [query for query in other._query_buffer if query not in self._query_buffer]
         new_filter = self.__class__()
-        new_filter._query_buffer = list(queries)
+        new_filter._query_buffer = queries
+        new_filter._in_values = {
+            query: values
+            for query, values in {**self._in_values, **other._in_values}.items()
+            if query in queries
+        }
         return new_filter
 
+    def split_in(self, parts: int = 2) -> List[Filter]:
+        """Делит самый длинный список in_ на parts фильтров"""
+        if not self._in_values:
+            return [self]
+        largest, (field, values) = max(
+            self._in_values.items(), key=lambda item: len(item[1][1]),
+        )
+        if len(values) < 2:
+            return [self]
+
+        size = ceil(len(values) / parts)
+        filters = []
+        for start in range(0, len(values), size):
+            new_filter = self.__class__()
+            for query in self._query_buffer:
+                if query == largest:
+                    new_filter.in_(field, values[start:start + size])
+                    continue
+                new_filter._add(query)
+                if query in self._in_values:
+                    new_filter._in_values[query] = self._in_values[query]
+            filters.append(new_filter)
+        return filters
+
 
 class Search(BaseQuery):
     """
@@ -127,7 +210,7 @@ class Search(BaseQuery):
         super().__init__()
         self._query_buffer.append(query)
 
-    def get_raw(self) -> str:
+    def _compile(self) -> str:
         return self._query_buffer[0]
 
 
@@ -139,15 +222,13 @@ class Ordering(BaseQuery):
     name = 'order'
 
     def asc(self, field):
-        self._query_buffer.append(f'{field},asc')
-        return self
+        return self._add(f'{field},asc')
 
     def desc(self, field):
-        self._query_buffer.append(f'{field},desc')
-        return self
+        return self._add(f'{field},desc')
 
-    def get_raw(self):
-        return ';'.join(set(self._query_buffer))
+    def _compile(self):
+        return ';'.join(self._query_buffer)
 
 
 class Expand(BaseQuery):
@@ -161,9 +242,9 @@ class Expand(BaseQuery):
         super().__init__()
         for entity_name in args:
             if len(entity_name.split('.')) <= 3:
-                self._query_buffer.append(entity_name)
+                self._add(entity_name)
 
-    def get_raw(self):
+    def _compile(self):
         return ','.join(self._query_buffer)
 
 
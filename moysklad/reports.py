@@ -0,0 +1,249 @@
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .http import MoySkladHttpClient, RequestConfig
+from .http.rate_limit import MAX_PARALLEL_REQUESTS
+from .queries import Query
+from .urls import ApiUrlRegistry
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+_DEFAULTS = {float: 0.0, int: 0, str: ''}
+_ARRAY_TYPECODES = {float: 'd', int: 'q'}
+_NUMPY_DTYPES = {float: 'float64', int: 'int64'}
+
+
+def get_href_id(href: Optional[str]) -> str:
+    if not href:
+        return ''
+    return href.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+
+
+class Column:
+    """
+    Колонка отчета: путь к значению в строке (через точку) и тип.
+    Для строк, полученных через explode, родительская строка доступна как parent.
+    """
+
+    def __init__(self, name: str, path: Optional[str] = None,
+                 dtype: type = float, default: Any = None,
+                 transform: Optional[Callable[[Any], Any]] = None) -> None:
+        self.name = name
+        self.path = tuple((path or name).split('.'))
+        self.dtype = dtype
+        self.default = _DEFAULTS[dtype] if default is None else default
+        self.transform = transform
+
+    def get(self, row: dict) -> Any:
+        value = row
+        for key in self.path:
+            if not isinstance(value, dict):
+                value = None
+                break
+            value = value.get(key)
+        if self.transform is not None:
+            value = self.transform(value)
+        if value is None:
+            return self.default
+        return self.dtype(value)
+
+
+STOCK_COLUMNS = (
+    Column('id', 'meta.href', str, transform=get_href_id),
+    Column('code', dtype=str),
+    Column('article', dtype=str),
+    Column('name', dtype=str),
+    Column('stock'),
+    Column('reserve'),
+    Column('inTransit'),
+    Column('quantity'),
+    Column('price'),
+    Column('salePrice'),
+)
+
+STOCK_BY_STORE_COLUMNS = (
+    Column('id', 'parent.meta.href', str, transform=get_href_id),
+    Column('store_id', 'meta.href', str, transform=get_href_id),
+    Column('store', 'name', str),
+    Column('stock'),
+    Column('reserve'),
+    Column('inTransit'),
+)
+
+
+class ColumnBatch:
+    """
+    Набор колонок одинаковой длины.
+    При установленном numpy колонки - numpy-массивы, иначе array.array и списки.
+    """
+
+    def __init__(self, columns: Dict[str, Any]) -> None:
+        self.columns = columns
+
+    @classmethod
+    def from_rows(cls, rows: List[dict], columns: Sequence[Column]) -> 'ColumnBatch':
+        data = {}
+        for column in columns:
+            values = (column.get(row) for row in rows)
+            if numpy is not None:
+                dtype = _NUMPY_DTYPES.get(column.dtype, object)
+                data[column.name] = numpy.fromiter(values, dtype=dtype, count=len(rows))
+            elif column.dtype in _ARRAY_TYPECODES:
+                data[column.name] = array(_ARRAY_TYPECODES[column.dtype], values)
+            else:
+                data[column.name] = list(values)
+        return cls(data)
+
+    @classmethod
+    def concat(cls, batches: Iterable['ColumnBatch'],
+               columns: Sequence[Column]) -> 'ColumnBatch':
+        parts: Dict[str, list] = {column.name: [] for column in columns}
+        for batch in batches:
+            for name, values in batch.columns.items():
+                parts[name].append(values)
+
+        data = {}
+        for column in columns:
+            chunks = parts[column.name]
+            if numpy is not None:
+                dtype = _NUMPY_DTYPES.get(column.dtype, object)
+                data[column.name] = (
+                    numpy.concatenate(chunks) if chunks else numpy.empty(0, dtype=dtype)
+                )
+            else:
+                merged = (
+                    array(_ARRAY_TYPECODES[column.dtype])
+                    if column.dtype in _ARRAY_TYPECODES else []
+                )
+                for chunk in chunks:
+                    merged.extend(chunk)
+                data[column.name] = merged
+        return cls(data)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    def to_arrow(self):
+        if pyarrow is None:
+            raise ImportError('pyarrow is required for ColumnBatch.to_arrow')
+        return pyarrow.RecordBatch.from_pydict({
+            name: values.tolist() if isinstance(values, array) else values
+            for name, values in self.columns.items()
+        })
+
+    def __str__(self):
+        return f'ColumnBatch [{len(self)} rows, {len(self.columns)} columns]'
+
+
+class Aggregation:
+    """Нарастающие суммы колонок sums с группировкой по колонке by"""
+
+    def __init__(self, by: str, sums: Sequence[str]) -> None:
+        self.by = by
+        self.sums = tuple(sums)
+        self._totals: Dict[Any, List[float]] = {}
+
+    def update(self, batch: ColumnBatch) -> None:
+        keys = batch[self.by]
+        if numpy is not None and len(keys):
+            unique, inverse = numpy.unique(keys, return_inverse=True)
+            sums = [
+                numpy.bincount(inverse, weights=batch[name], minlength=len(unique))
+                for name in self.sums
+            ]
+            for index, key in enumerate(unique.tolist()):
+                totals = self._totals.setdefault(key, [0.0] * len(self.sums))
+                for position, values in enumerate(sums):
+                    totals[position] += float(values[index])
+            return
+
+        columns = [batch[name] for name in self.sums]
+        for index, key in enumerate(keys):
+            totals = self._totals.setdefault(key, [0.0] * len(self.sums))
+            for position, values in enumerate(columns):
+                totals[position] += values[index]
+
+    def result(self) -> ColumnBatch:
+        keys = list(self._totals)
+        columns = [Column(self.by, dtype=str)] + [Column(name) for name in self.sums]
+        rows = [
+            dict(zip(self.sums, self._totals[key]), **{self.by: key})
+            for key in keys
+        ]
+        return ColumnBatch.from_rows(rows, columns)
+
+
+class ReportReader:
+    """
+    Постраничное чтение отчетов сразу в колонки.
+    Страницы загружаются параллельно и по одной превращаются в ColumnBatch,
+    так что словари строк не накапливаются в памяти.
+    """
+
+    def __init__(self, client: MoySkladHttpClient,
+                 max_workers: int = MAX_PARALLEL_REQUESTS,
+                 options: Optional[RequestConfig] = None) -> None:
+        self._client = client
+        self._max_workers = max_workers
+        self._options = options
+        self._methods = ApiUrlRegistry()
+
+    def _get_url(self, report_name: str, param: Optional[str]) -> str:
+        if param:
+            return self._methods.get_report_with_param_url(report_name, param)
+        return self._methods.get_report_url(report_name)
+
+    @staticmethod
+    def _explode(rows: List[dict], path: str) -> List[dict]:
+        exploded = []
+        for row in rows:
+            for item in row.get(path) or []:
+                exploded.append(dict(item, parent=row))
+        return exploded
+
+    def iter_batches(self, report_name: str,
+                     columns: Sequence[Column] = STOCK_COLUMNS,
+                     param: Optional[str] = None,
+                     query: Optional[Query] = None,
+                     explode: Optional[str] = None,
+                     ordered: bool = False) -> Iterator[ColumnBatch]:
+        """
+        explode - поле со вложенным списком (например stockByStore),
+        каждый элемент которого становится отдельной строкой
+        """
+        pages = self._client.iter_pages_parallel(
+            self._get_url(report_name, param),
+            query=query,
+            options=self._options,
+            max_workers=self._max_workers,
+            ordered=ordered,
+        )
+        for rows in pages:
+            if explode:
+                rows = self._explode(rows, explode)
+            yield ColumnBatch.from_rows(rows, columns)
+
+    def read(self, report_name: str,
+             columns: Sequence[Column] = STOCK_COLUMNS,
+             param: Optional[str] = None,
+             query: Optional[Query] = None,
+             explode: Optional[str] = None,
+             aggregate: Optional[Aggregation] = None) -> ColumnBatch:
+        """Весь отчет одним ColumnBatch или результат агрегации"""
+        batches = self.iter_batches(report_name, columns, param, query, explode)
+        if aggregate is None:
+            return ColumnBatch.concat(batches, columns)
+        for batch in batches:
+            aggregate.update(batch)
+        return aggregate.result()
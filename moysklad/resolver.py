@@ -0,0 +1,144 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode, urljoin
+
+from .bulk import chunked
+from .http import MoySkladHttpClient, RequestConfig
+from .http.base import PAGE_PARAMS_RESERVE
+from .http.rate_limit import MAX_PARALLEL_REQUESTS
+from .queries import Filter, Query
+from .urls import ApiUrlRegistry
+
+# длина одного условия фильтра по id в URL: id%3D<uuid>%3B
+ID_FILTER_LENGTH = len(urlencode({'': 'id=00000000-0000-0000-0000-000000000000;'})) - 1
+
+
+def _get_ref_href(value) -> Optional[str]:
+    # нераскрытая ссылка - словарь из одного ключа meta
+    if isinstance(value, dict) and len(value) == 1:
+        meta = value.get('meta')
+        if isinstance(meta, dict) and meta.get('type'):
+            return meta.get('href')
+    return None
+
+
+def _get_ref_key(meta: dict) -> Tuple[str, str]:
+    href = meta['href'].split('?', 1)[0].rstrip('/')
+    return meta['type'], href.rsplit('/', 1)[-1]
+
+
+class ReferenceResolver:
+    """
+    Раскрытие ссылок meta.href пачками.
+    Уже загруженные сущности хранятся в identity map по типу и id,
+    недостающие запрашиваются списком с фильтром по id,
+    по одному запросу на тип сущности и пачку из batch_size ссылок.
+    По умолчанию пачка - столько id, сколько помещается в max_url_length
+    клиента, чтобы каждая пачка уходила одним запросом.
+    """
+
+    def __init__(self, client: MoySkladHttpClient,
+                 batch_size: Optional[int] = None,
+                 max_workers: int = MAX_PARALLEL_REQUESTS,
+                 options: Optional[RequestConfig] = None) -> None:
+        self._client = client
+        self._batch_size = batch_size
+        self._max_workers = max_workers
+        self._options = options
+        self._methods = ApiUrlRegistry()
+        self._identity_map: Dict[Tuple[str, str], dict] = {}
+        self._lock = Lock()
+
+    def get(self, meta: dict) -> Optional[dict]:
+        with self._lock:
+            return self._identity_map.get(_get_ref_key(meta))
+
+    def add(self, entity: dict) -> None:
+        meta = entity.get('meta')
+        if meta and meta.get('href') and meta.get('type'):
+            with self._lock:
+                self._identity_map[_get_ref_key(meta)] = entity
+
+    def clear(self) -> None:
+        with self._lock:
+            self._identity_map.clear()
+
+    def _walk(self, container, path: List[str], refs: list) -> None:
+        if isinstance(container, list):
+            for item in container:
+                self._walk(item, path, refs)
+            return
+        if not isinstance(container, dict):
+            return
+        if 'rows' in container and path[0] not in container:
+            self._walk(container['rows'], path, refs)
+            return
+
+        key, rest = path[0], path[1:]
+        value = container.get(key)
+        if rest:
+            self._walk(value, rest, refs)
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                href = _get_ref_href(item)
+                if href:
+                    refs.append((value, index, item['meta']))
+        else:
+            href = _get_ref_href(value)
+            if href:
+                refs.append((container, key, value['meta']))
+
+    def _get_batch_size(self, entity_type: str) -> int:
+        if self._batch_size is not None:
+            return self._batch_size
+        url = urljoin(self._client.endpoint, self._methods.get_list_url(entity_type))
+        budget = (
+            self._client.max_url_length - PAGE_PARAMS_RESERVE
+            - len(url) - len('?filter=')
+        )
+        return max(1, budget // ID_FILTER_LENGTH)
+
+    def _fetch(self, entity_type: str, ids: List[str]) -> List[dict]:
+        # через iter_rows длинный фильтр in_ делится по max_url_length клиента
+        return list(self._client.iter_rows(
+            self._methods.get_list_url(entity_type),
+            query=Query(Filter().in_('id', ids)),
+            options=self._options,
+            prefetch=False,
+        ))
+
+    def resolve(self, rows: Iterable[dict], fields: Iterable[str]) -> list:
+        """
+        Подставляет сущности вместо ссылок по путям fields
+        ('agent', 'store', 'positions.assortment') и возвращает rows.
+        Одинаковые ссылки заменяются одним и тем же объектом.
+        """
+        rows = list(rows)
+        refs = []
+        for field in fields:
+            self._walk(rows, field.split('.'), refs)
+
+        missing: Dict[str, set] = {}
+        with self._lock:
+            for _, _, meta in refs:
+                key = _get_ref_key(meta)
+                if key not in self._identity_map:
+                    missing.setdefault(key[0], set()).add(key[1])
+
+        jobs = [
+            (entity_type, ids)
+            for entity_type, type_ids in missing.items()
+            for ids in chunked(sorted(type_ids), self._get_batch_size(entity_type))
+        ]
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            for entities in executor.map(lambda job: self._fetch(*job), jobs):
+                for entity in entities:
+                    self.add(entity)
+
+        with self._lock:
+            for parent, key, meta in refs:
+                entity = self._identity_map.get(_get_ref_key(meta))
+                if entity is not None:
+                    parent[key] = entity
+        return rows
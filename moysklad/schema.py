@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread
+from time import monotonic
+from typing import Any, Dict, Iterable, List, Optional
+
+from .http import MoySkladHttpClient
+from .http.rate_limit import MAX_PARALLEL_REQUESTS
+from .urls import ApiUrlRegistry
+
+DEFAULT_SCHEMA_TTL = 600.0
+
+
+class EntitySchema:
+    """Метаданные сущности с доп. полями, проиндексированными по id и имени"""
+
+    def __init__(self, entity_name: str, metadata: dict,
+                 attributes: List[dict]) -> None:
+        self.entity_name = entity_name
+        self.metadata = metadata
+        self.attributes = attributes
+        self._by_id = {attr['id']: attr for attr in attributes if 'id' in attr}
+        self._by_name = {attr['name']: attr for attr in attributes if 'name' in attr}
+
+    def get_attribute(self, key: str) -> Optional[dict]:
+        """Доп. поле по id или имени"""
+        return self._by_id.get(key) or self._by_name.get(key)
+
+    def get_attribute_by_id(self, id_: str) -> Optional[dict]:
+        return self._by_id.get(id_)
+
+    def get_attribute_by_name(self, name: str) -> Optional[dict]:
+        return self._by_name.get(name)
+
+    def make_attribute_value(self, key: str, value: Any) -> dict:
+        """Значение доп. поля для тела запроса на запись"""
+        attribute = self.get_attribute(key)
+        if attribute is None:
+            raise KeyError(f'Unknown attribute {key} of {self.entity_name}')
+        return {'meta': attribute['meta'], 'value': value}
+
+    def __str__(self):
+        return f'EntitySchema [{self.entity_name}]: {len(self.attributes)} attributes'
+
+
+class SchemaRegistry:
+    """
+    Кэш метаданных сущностей, общий для всех клиентов одного аккаунта.
+    Устаревшие схемы отдаются сразу и обновляются в фоне.
+    """
+    _instances: Dict[str, 'SchemaRegistry'] = {}
+    _instances_lock = Lock()
+
+    def __init__(self, client: MoySkladHttpClient,
+                 ttl: float = DEFAULT_SCHEMA_TTL,
+                 max_workers: int = MAX_PARALLEL_REQUESTS) -> None:
+        self._client = client
+        self._ttl = ttl
+        self._max_workers = max_workers
+        self._methods = ApiUrlRegistry()
+        self._lock = Lock()
+        self._schemas: Dict[str, EntitySchema] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._refreshing = set()
+
+    @classmethod
+    def for_account(cls, client: MoySkladHttpClient, **kwargs) -> 'SchemaRegistry':
+        with cls._instances_lock:
+            if client.login not in cls._instances:
+                cls._instances[client.login] = cls(client, **kwargs)
+            return cls._instances[client.login]
+
+    def _fetch(self, entity_name: str) -> EntitySchema:
+        metadata = self._client.get(self._methods.get_metadata_url(entity_name)).data
+        attributes = metadata.get('attributes')
+        if not isinstance(attributes, list):
+            # в API 1.2 доп. поля отдаются отдельной коллекцией
+            response = self._client.get(self._methods.get_metadata_attributes_url(entity_name))
+            attributes = response.rows or []
+        return EntitySchema(entity_name, metadata, attributes)
+
+    def _store(self, schema: EntitySchema) -> None:
+        with self._lock:
+            self._schemas[schema.entity_name] = schema
+            self._loaded_at[schema.entity_name] = monotonic()
+            self._refreshing.discard(schema.entity_name)
+
+    def load(self, entity_names: Iterable[str]) -> None:
+        """Загружает метаданные всех переданных сущностей параллельно"""
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            for schema in executor.map(self._fetch, set(entity_names)):
+                self._store(schema)
+
+    def _refresh(self, entity_name: str) -> None:
+        try:
+            self._store(self._fetch(entity_name))
+        finally:
+            with self._lock:
+                self._refreshing.discard(entity_name)
+
+    def get(self, entity_name: str) -> EntitySchema:
+        with self._lock:
+            schema = self._schemas.get(entity_name)
+            stale = (
+                schema is not None
+                and monotonic() - self._loaded_at[entity_name] > self._ttl
+                and entity_name not in self._refreshing
+            )
+            if stale:
+                self._refreshing.add(entity_name)
+
+        if schema is None:
+            schema = self._fetch(entity_name)
+            self._store(schema)
+        elif stale:
+            Thread(target=self._refresh, args=(entity_name,), daemon=True).start()
+        return schema
+
+    def get_attribute(self, entity_name: str, key: str) -> Optional[dict]:
+        return self.get(entity_name).get_attribute(key)
+
+    def invalidate(self, entity_name: Optional[str] = None) -> None:
+        with self._lock:
+            if entity_name is None:
+                self._schemas.clear()
+                self._loaded_at.clear()
+            else:
+                self._schemas.pop(entity_name, None)
+                self._loaded_at.pop(entity_name, None)
@@ -0,0 +1,197 @@
+from datetime import datetime, timedelta, timezone
+import json
+import sqlite3
+from threading import Lock
+from typing import Dict, Iterator, Optional
+
+from .http import MoySkladHttpClient, RequestConfig
+from .queries import Ordering, Query, Select
+from .urls import ApiUrlRegistry
+from .utils import MS_MATCH, get_time_string, parse_time_string
+
+DEFAULT_OVERLAP = timedelta(minutes=1)
+# время в API МойСклад - московское
+API_TIMEZONE = timezone(timedelta(hours=3))
+UPSERT_BATCH_SIZE = 1000
+
+
+class SqliteSyncStore:
+    """
+    Локальное зеркало сущностей и контрольные точки синхронизации в SQLite.
+    """
+
+    def __init__(self, path: str = ':memory:') -> None:
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS checkpoints ('
+                'account TEXT NOT NULL, entity TEXT NOT NULL, updated TEXT NOT NULL, '
+                'PRIMARY KEY (account, entity))'
+            )
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS entities ('
+                'account TEXT NOT NULL, entity TEXT NOT NULL, id TEXT NOT NULL, '
+                'updated TEXT, data TEXT NOT NULL, '
+                'PRIMARY KEY (account, entity, id))'
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def get_checkpoint(self, account: str, entity: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT updated FROM checkpoints WHERE account = ? AND entity = ?',
+                (account, entity),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_checkpoint(self, account: str, entity: str, updated: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT INTO checkpoints (account, entity, updated) VALUES (?, ?, ?) '
+                'ON CONFLICT (account, entity) DO UPDATE SET updated = excluded.updated '
+                'WHERE excluded.updated > checkpoints.updated',
+                (account, entity, updated),
+            )
+
+    def upsert(self, account: str, entity: str, rows: list) -> None:
+        # при повторной выгрузке строки с более старым updated не
+        # перетирают уже сохраненную версию
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT INTO entities (account, entity, id, updated, data) '
+                'VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (account, entity, id) DO UPDATE SET '
+                'updated = excluded.updated, data = excluded.data '
+                'WHERE entities.updated IS NULL OR excluded.updated >= entities.updated',
+                [
+                    (account, entity, row['id'], row.get('updated'),
+                     json.dumps(row, ensure_ascii=False))
+                    for row in rows
+                ],
+            )
+
+    def get(self, account: str, entity: str, id_: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data FROM entities WHERE account = ? AND entity = ? AND id = ?',
+                (account, entity, id_),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self, account: str, entity: str) -> int:
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM entities WHERE account = ? AND entity = ?',
+                (account, entity),
+            ).fetchone()[0]
+
+    def iter_entities(self, account: str, entity: str) -> Iterator[dict]:
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT data FROM entities WHERE account = ? AND entity = ? ORDER BY id',
+                (account, entity),
+            ).fetchall()
+        for row in rows:
+            yield json.loads(row[0])
+
+
+class EntitySync:
+    """
+    Инкрементальная синхронизация сущностей в локальное зеркало.
+    Каждый запуск забирает только строки, измененные после контрольной
+    точки (с запасом overlap), и сдвигает точку после сохранения всех строк.
+    Список читается по ключу, а не по offset: строки упорядочены по updated
+    и id, следующая страница запрашивается с updatedFrom последней строки,
+    повторно полученные строки отбрасываются по id и updated. Поэтому
+    изменение строк во время обхода не сдвигает непрочитанные страницы.
+    Точка не сдвигается дальше начала запуска.
+    """
+
+    def __init__(self, client: MoySkladHttpClient, store: SqliteSyncStore,
+                 overlap: timedelta = DEFAULT_OVERLAP,
+                 options: Optional[RequestConfig] = None,
+                 limit: int = Select.MAX_LIST_LIMIT) -> None:
+        self._client = client
+        self._store = store
+        self._overlap = overlap
+        self._limit = limit
+        self._options = options
+        self._methods = ApiUrlRegistry()
+
+    def _get_updated_from(self, checkpoint: Optional[str]) -> Optional[str]:
+        if not checkpoint:
+            return None
+        updated = parse_time_string(MS_MATCH.sub('', checkpoint))
+        return get_time_string(updated - self._overlap)
+
+    def _iter_pages(self, entity_name: str, query: Optional[Query],
+                    updated_from: Optional[str]) -> Iterator[list]:
+        query = Query(query or Query(), Ordering().asc('updated').asc('id'))
+        cursor = updated_from
+        offset = 0
+        # строки с updated не раньше cursor, которые уже были отданы
+        seen: Dict[str, Optional[str]] = {}
+        while True:
+            params = {'limit': self._limit, 'offset': offset}
+            if cursor:
+                params['updatedFrom'] = cursor
+            page = self._client.get(
+                self._methods.get_list_url(entity_name),
+                query=Query(query, params),
+                options=self._options,
+            ).rows or []
+
+            rows = [row for row in page if seen.get(row['id'], '') != row.get('updated')]
+            seen.update((row['id'], row.get('updated')) for row in rows)
+            if rows:
+                yield rows
+            if len(page) < self._limit:
+                return
+
+            # updatedFrom принимает время с точностью до секунды
+            last_updated = page[-1].get('updated')
+            next_cursor = MS_MATCH.sub('', last_updated) if last_updated else None
+            if next_cursor is None or next_cursor == cursor:
+                # вся страница в пределах одной секунды, ключ не продвинулся
+                offset += self._limit
+                continue
+            cursor, offset = next_cursor, 0
+            seen = {
+                id_: updated for id_, updated in seen.items()
+                if updated and MS_MATCH.sub('', updated) >= cursor
+            }
+
+    def sync(self, entity_name: str, query: Optional[Query] = None) -> int:
+        """Возвращает число полученных строк"""
+        account = self._client.login
+        started = get_time_string(datetime.now(API_TIMEZONE))
+        checkpoint = self._store.get_checkpoint(account, entity_name)
+
+        total = 0
+        max_updated = checkpoint
+        batch = {}
+        pages = self._iter_pages(entity_name, query, self._get_updated_from(checkpoint))
+        for rows in pages:
+            for row in rows:
+                batch[row['id']] = row
+                updated = row.get('updated')
+                if updated and (max_updated is None or updated > max_updated):
+                    max_updated = updated
+            if len(batch) >= UPSERT_BATCH_SIZE:
+                self._store.upsert(account, entity_name, list(batch.values()))
+                total += len(batch)
+                batch = {}
+
+        if batch:
+            self._store.upsert(account, entity_name, list(batch.values()))
+            total += len(batch)
+
+        if max_updated and MS_MATCH.sub('', max_updated) > started:
+            max_updated = started
+        if max_updated and max_updated != checkpoint:
+            self._store.set_checkpoint(account, entity_name, max_updated)
+        return total
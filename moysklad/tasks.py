@@ -0,0 +1,165 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Condition, Thread
+from time import monotonic
+from typing import IO, List, Optional, Union
+
+from .exceptions import AsyncTaskException
+from .http import MoySkladHttpClient, RequestConfig
+from .http.rate_limit import MAX_PARALLEL_REQUESTS
+from .queries import Query
+from .urls import ApiUrlRegistry
+
+TASK_DONE = 'DONE'
+TASK_PENDING_STATES = ('PENDING', 'PROCESSING')
+
+
+class _Task:
+    __slots__ = ('task_id', 'sink', 'future', 'interval', 'poll_at')
+
+    def __init__(self, task_id: str, sink, future: Future, interval: float) -> None:
+        self.task_id = task_id
+        self.sink = sink
+        self.future = future
+        self.interval = interval
+        self.poll_at = monotonic() + interval
+
+
+class AsyncTaskScheduler:
+    """
+    Асинхронные задачи МойСклад (выгрузки и тяжелые отчеты с async=true).
+    Задачи запускаются сразу, статус всех задач опрашивается одним фоновым
+    потоком с нарастающим интервалом, результат загружается по готовности.
+    submit возвращает concurrent.futures.Future.
+    """
+
+    def __init__(self, client: MoySkladHttpClient,
+                 max_workers: int = MAX_PARALLEL_REQUESTS,
+                 poll_interval: float = 1.0,
+                 max_poll_interval: float = 30.0,
+                 backoff: float = 1.5) -> None:
+        self._client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._poll_interval = poll_interval
+        self._max_poll_interval = max_poll_interval
+        self._backoff = backoff
+        self._methods = ApiUrlRegistry()
+        self._tasks: List[_Task] = []
+        # задачи, которые запускаются и еще не попали в _tasks
+        self._starting = 0
+        self._condition = Condition()
+        self._closed = False
+        self._poller = Thread(target=self._poll_loop, daemon=True)
+        self._poller.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+
+    def submit(self, method: str, query: Optional[Query] = None,
+               sink: Optional[Union[str, IO[bytes]]] = None) -> Future:
+        """
+        Запускает method как асинхронную задачу.
+        Результат future - ApiResponse или, если задан sink, число
+        байт, записанных в sink.
+        """
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('AsyncTaskScheduler is shut down')
+            self._starting += 1
+        self._executor.submit(self._start, method, query, sink, future)
+        return future
+
+    def _start(self, method: str, query: Optional[Query], sink, future: Future) -> None:
+        task = None
+        try:
+            if future.set_running_or_notify_cancel():
+                res = self._client.get(
+                    method,
+                    query=Query(query or Query(), {'async': 'true'}),
+                    options=RequestConfig(raw_response=True, use_cache=False),
+                )
+                task = _Task(
+                    task_id=res.headers['Location'].rstrip('/').rsplit('/', 1)[-1],
+                    sink=sink,
+                    future=future,
+                    interval=self._poll_interval,
+                )
+        except Exception as exc:  # pylint: disable=broad-except
+            future.set_exception(exc)
+        finally:
+            with self._condition:
+                self._starting -= 1
+                if task is not None:
+                    self._tasks.append(task)
+                self._condition.notify()
+
+    def _poll_loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._tasks and (self._starting or not self._closed):
+                    self._condition.wait()
+                if not self._tasks:
+                    return
+                now = monotonic()
+                due = [task for task in self._tasks if task.poll_at <= now]
+                if not due:
+                    next_poll = min(task.poll_at for task in self._tasks)
+                    self._condition.wait(next_poll - now)
+                    continue
+                for task in due:
+                    self._tasks.remove(task)
+
+            for task in due:
+                self._poll(task)
+
+    def _poll(self, task: _Task) -> None:
+        try:
+            # состояние задачи меняется между опросами, кэш клиента не используется
+            state = self._client.get(
+                self._methods.get_async_task_url(task.task_id),
+                options=RequestConfig(use_cache=False),
+            ).data
+        except Exception as exc:  # pylint: disable=broad-except
+            task.future.set_exception(exc)
+            return
+
+        status = state.get('state')
+        if status == TASK_DONE:
+            result_url = (
+                state.get('resultUrl')
+                or self._methods.get_async_task_result_url(task.task_id)
+            )
+            try:
+                self._executor.submit(self._fetch_result, task, result_url)
+            except RuntimeError as exc:
+                task.future.set_exception(exc)
+        elif status in TASK_PENDING_STATES:
+            task.interval = min(task.interval * self._backoff, self._max_poll_interval)
+            task.poll_at = monotonic() + task.interval
+            with self._condition:
+                self._tasks.append(task)
+        else:
+            task.future.set_exception(AsyncTaskException(state))
+
+    def _fetch_result(self, task: _Task, result_url: str) -> None:
+        try:
+            if task.sink is not None:
+                result = self._client.download(result_url, task.sink)
+            else:
+                result = self._client.get(result_url, options=RequestConfig(use_cache=False))
+        except Exception as exc:  # pylint: disable=broad-except
+            task.future.set_exception(exc)
+            return
+        task.future.set_result(result)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Дожидается завершения всех задач (при wait=True) и останавливает потоки"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if wait:
+            self._poller.join()
+        self._executor.shutdown(wait=wait)
@@ -12,6 +12,10 @@ class ApiUrlRegistry(AbstractSingleton):
     def get_delete_url(self, entity_name, entity_id):
         return self.get_by_id_url(entity_name, entity_id)
 
+    @staticmethod
+    def get_mass_delete_url(entity_name):
+        return f'entity/{entity_name}/delete'
+
     @staticmethod
     def get_by_id_url(entity_name, entity_id):
         return f'entity/{entity_name}/{entity_id}'
@@ -37,6 +41,10 @@ class ApiUrlRegistry(AbstractSingleton):
     def get_metadata_url(entity_name):
         return f'entity/{entity_name}/metadata'
 
+    @staticmethod
+    def get_metadata_attributes_url(entity_name):
+        return f'entity/{entity_name}/metadata/attributes'
+
     @staticmethod
     def get_metadata_attribute_url(entity_name, field_id):
         return f'entity/{entity_name}/metadata/attributes/{field_id}'
@@ -96,3 +104,11 @@ class ApiUrlRegistry(AbstractSingleton):
     @staticmethod
     def get_audit_filters_url():
         return 'audit/metadata/filters'
+
+    @staticmethod
+    def get_async_task_url(task_id):
+        return f'async/{task_id}'
+
+    @staticmethod
+    def get_async_task_result_url(task_id):
+        return f'async/{task_id}/result'
@@ -17,7 +17,10 @@ VERSION = None
 REQUIRED = ['requests', ]
 
 EXTRAS = {
-    'proxy': ['PySocks']
+    'proxy': ['PySocks'],
+    'async': ['aiohttp'],
+    'reports': ['numpy', 'pyarrow'],
+    'http2': ['httpx[http2]'],
 }
 
 # ------------------------------------------------
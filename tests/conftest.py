@@ -0,0 +1,47 @@
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from moysklad.http import FakeTransport, MoySkladHttpClient
+from moysklad.http.utils import build_response
+
+
+def json_response(data, status_code=200, headers=None):
+    return build_response(
+        status_code,
+        {'Content-Type': 'application/json;charset=utf-8', **(headers or {})},
+        json.dumps(data).encode(),
+    )
+
+
+def get_params(prepared) -> dict:
+    return {key: value[0] for key, value in parse_qs(urlparse(prepared.url).query).items()}
+
+
+def paged_handler(rows, with_size=True, with_next_href=True):
+    """Ответ списка со страницами по limit/offset, как у МойСклад"""
+    def handler(prepared):
+        params = get_params(prepared)
+        limit = int(params.get('limit', 1000))
+        offset = int(params.get('offset', 0))
+        meta = {'limit': limit, 'offset': offset}
+        if with_size:
+            meta['size'] = len(rows)
+        if with_next_href and offset + limit < len(rows):
+            meta['nextHref'] = f'http://fake/next?limit={limit}&offset={offset + limit}'
+        return json_response({'meta': meta, 'rows': rows[offset:offset + limit]})
+    return handler
+
+
+@pytest.fixture
+def transport():
+    return FakeTransport()
+
+
+@pytest.fixture
+def client(transport):
+    client = MoySkladHttpClient('test', 'password', transport=transport)
+    client.set_rate_limiter(None)
+    yield client
+    client.close()
@@ -0,0 +1,94 @@
+import asyncio
+import base64
+import warnings
+
+import pytest
+
+from moysklad.api import MoySklad
+from moysklad.http import AsyncMoySkladHttpClient
+
+aiohttp = pytest.importorskip('aiohttp')
+web = pytest.importorskip('aiohttp.web')
+
+
+async def serve_and_count(coroutine_factory):
+    state = {'active': 0, 'max_active': 0}
+
+    async def handler(_):
+        state['active'] += 1
+        state['max_active'] = max(state['max_active'], state['active'])
+        await asyncio.sleep(0.02)
+        state['active'] -= 1
+        return web.json_response({'meta': {'size': 0}, 'rows': []})
+
+    app = web.Application()
+    app.router.add_get('/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        await coroutine_factory(f'http://127.0.0.1:{port}/')
+    finally:
+        await runner.cleanup()
+    return state
+
+
+def make_client(endpoint, login, session=None):
+    client = AsyncMoySkladHttpClient(login, 'password', session=session)
+    client._endpoint = endpoint
+    client.set_rate_limiter(None)
+    return client
+
+
+def test_parallel_limit_is_shared_by_clients_of_one_login():
+    async def run(endpoint):
+        async with aiohttp.ClientSession() as session:
+            clients = [make_client(endpoint, 'async-same', session) for _ in range(2)]
+            await asyncio.gather(*(
+                client.get('entity/product') for client in clients for _ in range(10)
+            ))
+            for client in clients:
+                await client.close()
+            assert not session.closed
+
+    state = asyncio.run(serve_and_count(run))
+    assert state['max_active'] <= 5
+
+
+def test_basic_auth_is_sent_as_header():
+    authorization = []
+
+    async def handler(request):
+        authorization.append(request.headers.get('Authorization'))
+        return web.json_response({'rows': []})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with make_client(f'http://127.0.0.1:{port}/', 'async-ö') as client:
+                await client.get('entity/product')
+        finally:
+            await runner.cleanup()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        asyncio.run(run())
+    assert authorization == ['Basic ' + base64.b64encode('async-ö:password'.encode('latin1')).decode()]
+
+
+def test_api_aclose_closes_async_session():
+    async def run():
+        api = MoySklad('async-aclose', 'password', None, 'hash')
+        session = api.get_async_client().session
+        await api.aclose()
+        return session
+
+    assert asyncio.run(run()).closed
@@ -0,0 +1,56 @@
+import json
+
+from moysklad.bulk import BulkWriter
+
+from .conftest import json_response
+
+
+def bulk_handler(calls):
+    def handler(prepared):
+        items = json.loads(prepared.body)
+        calls.append(items)
+        rows = [
+            {'errors': [{'code': 3000, 'error': 'bad item'}]} if item.get('bad')
+            else dict(item, id=f'id-{item["name"]}')
+            for item in items
+        ]
+        failed = any(item.get('bad') for item in items)
+        return json_response(rows, status_code=400 if failed else 200)
+    return handler
+
+
+def test_results_are_mapped_to_items(client, transport):
+    calls = []
+    transport.add_handler('POST', 'entity/product', bulk_handler(calls))
+    items = [{'name': str(index), 'bad': index % 7 == 3} for index in range(25)]
+
+    result = BulkWriter(client, chunk_size=10, max_workers=2).create_or_update('product', items)
+
+    assert [len(chunk) for chunk in calls] == [10, 10, 5]
+    assert [item.index for item in result] == list(range(25))
+    assert [item.index for item in result.failed] == [3, 10, 17, 24]
+    assert result[0].entity['id'] == 'id-0'
+    assert result[3].errors == [{'code': 3000, 'error': 'bad item'}]
+    assert result[3].entity is None
+
+
+def test_failed_chunk_request_marks_every_item(client, transport):
+    transport.add_response('POST', 'entity/product', {'errors': [{'code': 1, 'error': 'x'}]},
+                           status_code=500)
+    result = BulkWriter(client, chunk_size=2).create_or_update('product', [{'name': 'a'}] * 3)
+    assert len(result.failed) == 3
+    assert all(item.exception is not None for item in result)
+
+
+def test_delete_sends_refs(client, transport):
+    calls = []
+
+    def handler(prepared):
+        calls.append(json.loads(prepared.body))
+        return json_response([{'info': 'ok'}])
+
+    transport.add_handler('POST', 'entity/product/delete', handler)
+    result = BulkWriter(client).delete('product', [{'meta': {'href': 'h'}, 'name': 'a'}])
+
+    assert calls == [[{'meta': {'href': 'h'}}]]
+    assert result[0].ok
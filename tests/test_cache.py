@@ -0,0 +1,133 @@
+import time
+
+from moysklad.http import RequestConfig, ResponseCache, ShelveCacheBackend
+from moysklad.http.cache import CacheEntry
+
+from .conftest import json_response
+
+
+def counting_handler(calls, etag=None):
+    def handler(prepared):
+        calls.append(prepared)
+        if etag and prepared.headers.get('If-None-Match') == etag:
+            return json_response(None, status_code=304, headers={'ETag': etag})
+        headers = {'ETag': etag} if etag else {}
+        return json_response({'id': '1', 'calls': len(calls)}, headers=headers)
+    return handler
+
+
+def test_fresh_entry_is_served_from_cache(client, transport):
+    calls = []
+    transport.add_handler('GET', 'entity/currency', counting_handler(calls))
+    client.set_cache(ResponseCache(default_ttl=60))
+
+    first = client.get('entity/currency')
+    second = client.get('entity/currency')
+
+    assert len(calls) == 1
+    assert first.data == second.data
+
+
+def test_cache_key_depends_on_headers(client, transport):
+    calls = []
+    transport.add_handler('GET', 'entity/currency', counting_handler(calls))
+    client.set_cache(ResponseCache(default_ttl=60))
+
+    client.get('entity/currency')
+    client.get('entity/currency', options=RequestConfig(format_millisecond=True))
+    client.get('entity/currency', options=RequestConfig(custom_headers={'X-Test': '1'}))
+
+    assert len(calls) == 3
+    assert calls[1].headers['X-Lognex-Format-Millisecond'] == 'true'
+
+
+def test_cache_key_depends_on_pos_token(client, transport):
+    calls = []
+    transport.add_handler('GET', 'entity/currency', counting_handler(calls))
+    client.set_cache(ResponseCache(default_ttl=60))
+    options = RequestConfig(use_pos_api=True, use_pos_token=True)
+
+    client.set_pos_token('first')
+    client.get('entity/currency', options=options)
+    client.set_pos_token('second')
+    client.get('entity/currency', options=options)
+
+    assert len(calls) == 2
+
+
+def test_write_invalidates_entity_entries(client, transport):
+    calls = []
+    transport.add_handler('GET', 'entity/product', counting_handler(calls))
+    transport.add_response('POST', 'entity/product', {'id': '2'})
+    client.set_cache(ResponseCache(default_ttl=60))
+
+    client.get('entity/product')
+    client.post('entity/product', data={'name': 'new'})
+    client.get('entity/product')
+
+    assert len(calls) == 2
+
+
+def test_write_by_absolute_href_invalidates_entity_entries(client, transport):
+    calls = []
+    transport.add_handler('GET', 'entity/product/1', counting_handler(calls))
+    transport.add_response('PUT', 'entity/product/1', {'id': '1'})
+    client.set_cache(ResponseCache(default_ttl=60))
+    href = f'{client.endpoint}entity/product/1?expand=supplier'
+
+    assert client.get('entity/product/1').data['calls'] == 1
+    client.put(href, data={'name': 'changed'})
+
+    assert client.get('entity/product/1').data['calls'] == 2
+
+
+def test_pos_write_invalidates_pos_entries(client, transport):
+    calls = []
+    transport.add_handler('GET', 'admin/retailstore', counting_handler(calls))
+    transport.add_response('POST', 'admin/retailstore', {'id': '1'})
+    client.set_cache(ResponseCache(default_ttl=60))
+    options = RequestConfig(use_pos_api=True)
+
+    client.get('admin/retailstore', options=options)
+    client.post('admin/retailstore', data={}, options=options)
+    client.get('admin/retailstore', options=options)
+
+    assert len(calls) == 2
+
+
+def test_stale_entry_is_revalidated_with_etag(client, transport):
+    calls = []
+    transport.add_handler('GET', 'entity/product', counting_handler(calls, etag='"v1"'))
+    client.set_cache(ResponseCache(default_ttl=0.01))
+
+    first = client.get('entity/product')
+    time.sleep(0.02)
+    second = client.get('entity/product')
+
+    assert calls[1].headers['If-None-Match'] == '"v1"'
+    assert second.data == first.data
+
+
+def test_shelve_backend_evicts_least_recently_used(tmp_path):
+    backend = ShelveCacheBackend(str(tmp_path / 'cache'), maxsize=2)
+    for key in ('a', 'b'):
+        backend.set(key, CacheEntry('', 200, {}, b'', None, time.time() + 60))
+    backend.get('a')
+    backend.set('c', CacheEntry('', 200, {}, b'', None, time.time() + 60))
+
+    assert sorted(backend.keys()) == ['a', 'c']
+    backend.close()
+
+
+def test_only_methods_from_ttls_are_cached_by_default(client, transport):
+    calls = []
+    transport.add_handler('GET', 'entity/currency', counting_handler(calls))
+    transport.add_handler('GET', 'entity/customerorder', counting_handler(calls))
+    client.set_cache(ResponseCache(ttls={r'entity/currency': 3600}))
+
+    for _ in range(2):
+        client.get('entity/currency')
+        client.get('entity/customerorder')
+
+    assert [prepared.url.rsplit('/', 1)[-1] for prepared in calls] \
+        == ['currency', 'customerorder', 'customerorder']
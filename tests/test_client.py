@@ -0,0 +1,79 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+from requests import Session
+
+from moysklad.http import MoySkladHttpClient, RequestsTransport
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # noqa N802
+        self.server.connections.add(self.client_address)
+        body = json.dumps({'meta': {'size': 0}, 'rows': []}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    server.connections = set()
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, **kwargs):
+    client = MoySkladHttpClient('test', 'password', **kwargs)
+    client._endpoint = f'http://127.0.0.1:{server.server_address[1]}/'
+    client.set_rate_limiter(None)
+    return client
+
+
+def test_requests_reuse_keep_alive_connection(server):
+    with make_client(server, pool_maxsize=4) as client:
+        session = client.session
+        for _ in range(5):
+            client.get('entity/product')
+
+        assert client.session is session
+        assert session.get_adapter('https://').poolmanager.connection_pool_kw['maxsize'] == 4
+    assert len(server.connections) == 1
+
+
+def test_close_releases_owned_session(server):
+    client = make_client(server)
+    client.get('entity/product')
+    session = client.session
+
+    client.close()
+
+    assert client.session is not session
+    assert not session.get_adapter('http://').poolmanager.pools
+
+
+def test_external_session_and_transport_are_not_closed(server):
+    session = Session()
+    with make_client(server, session=session) as client:
+        client.get('entity/product')
+    assert client.session is session
+    assert session.get_adapter('http://').poolmanager.pools
+
+    transport = RequestsTransport()
+    with make_client(server, transport=transport) as client:
+        client.get('entity/product')
+    assert transport.session.get_adapter('http://').poolmanager.pools
+    transport.close()
+    session.close()
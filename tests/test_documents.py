@@ -0,0 +1,38 @@
+import io
+
+from moysklad.documents import DocumentPrinter
+from moysklad.http import RequestConfig
+from moysklad.http.utils import build_response
+
+PDF = b'%PDF' + b'x' * 100000
+
+
+def test_export_downloads_file_with_printer_options(client, transport):
+    transport.add_handler('POST', 'entity/demand/1/export', lambda prepared: build_response(
+        303, {'Location': 'https://fake/files/1.pdf'}, b'',
+    ))
+    transport.add_response('GET', 'files/1.pdf', content=PDF,
+                           headers={'Content-Type': 'application/pdf'})
+    printer = DocumentPrinter(client, options=RequestConfig(custom_headers={'X-Test': '1'}))
+    sink = io.BytesIO()
+
+    assert printer.export('demand', '1', {'meta': {'href': 'template'}}, sink) == len(PDF)
+    assert sink.getvalue() == PDF
+    assert all(prepared.headers['X-Test'] == '1' for prepared in transport.requests)
+
+
+def test_download_keeps_non_binary_body_as_is(client, transport):
+    csv = b'id;name\n1;Product\n'
+    html = b'<html><body>report</body></html>'
+    json_body = b'{"rows": []}'
+    transport.add_response('GET', 'files/report.csv', content=csv,
+                           headers={'Content-Type': 'text/csv;charset=utf-8'})
+    transport.add_response('GET', 'files/report.html', content=html,
+                           headers={'Content-Type': 'text/html'})
+    transport.add_response('GET', 'files/report.json', content=json_body,
+                           headers={'Content-Type': 'application/json'})
+
+    for name, body in (('report.csv', csv), ('report.html', html), ('report.json', json_body)):
+        sink = io.BytesIO()
+        assert client.download(f'https://fake/files/{name}', sink) == len(body)
+        assert sink.getvalue() == body
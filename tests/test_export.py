@@ -0,0 +1,109 @@
+import csv
+import io
+
+import pytest
+
+from moysklad.export import CsvExportWriter, Exporter, Flattener, ParquetExportWriter
+from moysklad.schema import SchemaRegistry
+
+from .conftest import paged_handler
+
+ATTRIBUTES = [
+    {'id': 'a1', 'name': 'color', 'type': 'string', 'meta': {'href': 'https://fake/a1'}},
+    {'id': 'a2', 'name': 'weight', 'type': 'double', 'meta': {'href': 'https://fake/a2'}},
+]
+
+
+@pytest.fixture(autouse=True)
+def product_metadata(client, transport):
+    transport.add_response('GET', 'entity/product/metadata', {'attributes': ATTRIBUTES})
+    SchemaRegistry._instances.pop(client.login, None)
+    yield
+    SchemaRegistry._instances.pop(client.login, None)
+
+
+def sparse_rows(count=2500, attributes_from=1500):
+    rows = []
+    for index in range(count):
+        row = {'id': str(index), 'name': f'product {index}', 'sum': 0}
+        if index >= attributes_from:
+            row['sum'] = 100.5
+            row['description'] = 'new'
+            row['attributes'] = [
+                {'name': 'color', 'value': 'red'},
+                {'name': 'weight', 'value': 2},
+            ]
+        rows.append(row)
+    return rows
+
+
+def test_flattener_replaces_references_and_attributes():
+    row = {
+        'meta': {'href': 'https://fake/entity/product/1'},
+        'agent': {'meta': {'href': 'https://fake/entity/counterparty/2'}},
+        'buyPrice': {'value': 10, 'currency': {'meta': {'href': 'https://fake/currency/3'}}},
+        'attributes': [{'name': 'color', 'value': {'name': 'red', 'meta': {}}}],
+        'barcodes': [{'ean13': '1'}],
+    }
+    assert Flattener().flatten(row) == {
+        'agent': '2',
+        'buyPrice.value': 10,
+        'buyPrice.currency': '3',
+        'attributes.color': 'red',
+        'barcodes': '[{"ean13": "1"}]',
+    }
+
+
+def test_columns_include_attributes_from_metadata(client):
+    assert Exporter(client).get_columns('product', ['id', 'sum']) \
+        == ['id', 'sum', 'attributes.color', 'attributes.weight']
+
+
+def test_csv_keeps_sparse_attributes(client, transport):
+    transport.add_handler('GET', 'entity/product', paged_handler(sparse_rows()))
+    exporter = Exporter(client)
+    fp = io.StringIO()
+    writer = CsvExportWriter(fp, exporter.get_columns('product', ['id', 'sum']))
+
+    assert exporter.export('product', writer) == 2500
+
+    rows = list(csv.DictReader(io.StringIO(fp.getvalue())))
+    assert len(rows) == 2500
+    assert rows[0] == {'id': '0', 'sum': '0', 'attributes.color': '', 'attributes.weight': ''}
+    assert rows[-1] == {
+        'id': '2499', 'sum': '100.5', 'attributes.color': 'red', 'attributes.weight': '2',
+    }
+
+
+def test_parquet_keeps_sparse_attributes(client, transport, tmp_path):
+    pyarrow = pytest.importorskip('pyarrow')
+    parquet = pytest.importorskip('pyarrow.parquet')
+    transport.add_handler('GET', 'entity/product', paged_handler(sparse_rows()))
+    exporter = Exporter(client, parallel=True)
+    schema = exporter.get_schema('product', {'id': pyarrow.string(), 'sum': pyarrow.float64()})
+    path = str(tmp_path / 'products.parquet')
+
+    assert exporter.export('product', ParquetExportWriter(path, schema)) == 2500
+
+    table = parquet.read_table(path)
+    assert table.schema.field('attributes.weight').type == pyarrow.float64()
+    rows = sorted(table.to_pylist(), key=lambda row: int(row['id']))
+    assert rows[0] == {'id': '0', 'sum': 0.0, 'attributes.color': None, 'attributes.weight': None}
+    assert rows[-1] == {
+        'id': '2499', 'sum': 100.5, 'attributes.color': 'red', 'attributes.weight': 2.0,
+    }
+
+
+def test_empty_export_writes_header_and_schema(client, transport, tmp_path):
+    pyarrow = pytest.importorskip('pyarrow')
+    parquet = pytest.importorskip('pyarrow.parquet')
+    transport.add_handler('GET', 'entity/product', paged_handler([]))
+    path = str(tmp_path / 'empty.parquet')
+    schema = pyarrow.schema([('id', pyarrow.string())])
+
+    assert Exporter(client).export('product', ParquetExportWriter(path, schema)) == 0
+    assert parquet.read_table(path).schema == schema
+
+    fp = io.StringIO()
+    assert Exporter(client).export('product', CsvExportWriter(fp, ['id', 'name'])) == 0
+    assert fp.getvalue() == 'id,name\r\n'
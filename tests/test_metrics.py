@@ -0,0 +1,86 @@
+import pytest
+
+from moysklad.exceptions import ApiResponseException
+from moysklad.http import MetricsCollector, RequestObserver
+from moysklad.http.metrics import Histogram, get_endpoint_template
+
+PRODUCT_ID = '3f2b1a7e-0c4d-11ee-0a80-0b5e000f1a2b'
+
+
+def test_endpoint_template_replaces_ids():
+    assert get_endpoint_template(f'entity/product/{PRODUCT_ID}/audit?limit=1') \
+        == 'entity/product/{id}/audit'
+    assert get_endpoint_template(f'entity/product/{PRODUCT_ID}') == 'entity/product/{id}'
+    assert get_endpoint_template('entity/product') == 'entity/product'
+
+
+def test_histogram_quantile_uses_bucket_bounds():
+    histogram = Histogram((0.1, 1.0))
+    assert histogram.quantile(0.5) is None
+    for value in (0.05, 0.05, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    assert histogram.quantile(1.0) == float('inf')
+
+
+def test_collector_aggregates_requests_by_endpoint(client, transport):
+    transport.add_response('GET', 'entity/product', {'rows': []},
+                           headers={'X-RateLimit-Remaining': '40'})
+    transport.add_response('GET', f'entity/product/{PRODUCT_ID}', {'id': PRODUCT_ID},
+                           headers={'X-RateLimit-Remaining': '39'})
+    collector = MetricsCollector()
+    client.add_observer(collector)
+
+    client.get('entity/product')
+    client.get(f'entity/product/{PRODUCT_ID}')
+    client.get(f'entity/product/{PRODUCT_ID}')
+    with pytest.raises(ApiResponseException):
+        client.get('entity/missing')
+
+    snapshot = collector.snapshot()
+    endpoints = snapshot['endpoints']
+    assert endpoints['GET entity/product']['requests'] == {'200': 1}
+    by_id = endpoints['GET entity/product/{id}']
+    assert by_id['requests'] == {'200': 2}
+    assert by_id['counters']['bytes_received'] > 0
+    assert by_id['timings']['total']['count'] == 2
+    assert endpoints['GET entity/missing']['counters']['errors'] == 1
+    assert snapshot['rate_limit_remaining'] == 39
+
+
+def test_collector_exports_prometheus_text(client, transport):
+    transport.add_response('GET', 'entity/product', {'rows': []},
+                           headers={'X-RateLimit-Remaining': '40'})
+    collector = MetricsCollector()
+    client.add_observer(collector)
+    client.get('entity/product')
+    client.remove_observer(collector)
+    client.get('entity/product')
+
+    lines = collector.to_prometheus().splitlines()
+    labels = 'method="GET",endpoint="entity/product"'
+    assert f'moysklad_client_requests_total{{{labels},status="200"}} 1' in lines
+    assert f'moysklad_client_total_seconds_bucket{{{labels},le="+Inf"}} 1' in lines
+    assert f'moysklad_client_total_seconds_count{{{labels}}} 1' in lines
+    assert 'moysklad_client_rate_limit_remaining 40' in lines
+
+    collector.reset()
+    assert collector.to_prometheus() == '\n'
+
+
+def test_observer_is_not_called_after_removal(client, transport):
+    transport.add_response('GET', 'entity/product', {'rows': []})
+    calls = []
+
+    class Observer(RequestObserver):
+        def on_request(self, info):
+            calls.append(str(info))
+
+    observer = Observer()
+    client.add_observer(observer)
+    client.get('entity/product')
+    client.remove_observer(observer)
+    client.get('entity/product')
+
+    assert calls == ['RequestInfo [GET entity/product 200]']
@@ -0,0 +1,30 @@
+import pytest
+
+from .conftest import paged_handler
+
+ROWS = [{'id': str(index)} for index in range(2500)]
+
+
+@pytest.mark.parametrize('with_size', [True, False])
+def test_iter_rows_reads_all_pages(client, transport, with_size):
+    transport.add_handler('GET', 'audit', paged_handler(ROWS, with_size=with_size))
+    assert list(client.iter_rows('audit')) == ROWS
+
+
+@pytest.mark.parametrize('with_size', [True, False])
+def test_fetch_all_reads_all_pages(client, transport, with_size):
+    transport.add_handler('GET', 'audit', paged_handler(ROWS, with_size=with_size))
+    assert client.fetch_all('audit') == ROWS
+
+
+def test_iter_pages_parallel_plans_windows_by_size(client, transport):
+    transport.add_handler('GET', 'entity/product', paged_handler(ROWS))
+    pages = list(client.iter_pages_parallel('entity/product', max_workers=2))
+    assert [len(page) for page in pages] == [1000, 1000, 500]
+    assert len(transport.requests) == 3
+
+
+def test_unordered_pages_contain_all_rows(client, transport):
+    transport.add_handler('GET', 'entity/product', paged_handler(ROWS))
+    pages = client.iter_pages_parallel('entity/product', ordered=False)
+    assert sorted((row for page in pages for row in page), key=lambda row: int(row['id'])) == ROWS
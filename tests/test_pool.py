@@ -0,0 +1,63 @@
+import gc
+from threading import Event
+import time
+
+from moysklad.http import MoySkladHttpClient, RateLimiter
+from moysklad.pool import ClientPool
+
+from .conftest import json_response
+
+
+def test_evicted_tenants_release_rate_limiters(transport):
+    with ClientPool(max_tenants=10, max_workers=2, transport=transport) as pool:
+        before = len(RateLimiter._instances)
+        for index in range(200):
+            pool.get_client(f'pool-tenant-{index}', 'password')
+        gc.collect()
+        assert len(pool) == 10
+        assert len(RateLimiter._instances) - before <= 10
+
+
+def test_idle_tenants_expire_without_new_tenants(transport):
+    with ClientPool(idle_ttl=0.05, max_workers=1, transport=transport) as pool:
+        pool.get_client('pool-idle', 'password')
+        time.sleep(0.2)
+        gc.collect()
+        assert len(pool) == 0
+        assert 'pool-idle' not in RateLimiter._instances
+
+
+def test_evicted_tenant_keeps_budget_shared_with_other_clients(transport):
+    outside = MoySkladHttpClient('pool-shared', 'password', transport=transport)
+    with ClientPool(idle_ttl=0.05, max_workers=1, transport=transport) as pool:
+        assert pool.get_client('pool-shared', 'password').rate_limiter is outside.rate_limiter
+        time.sleep(0.2)
+        gc.collect()
+        assert len(pool) == 0
+        assert pool.get_client('pool-shared', 'password').rate_limiter is outside.rate_limiter
+
+
+def test_tenants_are_served_round_robin(transport):
+    order = []
+
+    def handler(prepared):
+        order.append(prepared.headers['Authorization'])
+        return json_response({'rows': []})
+
+    transport.add_handler('GET', 'entity/product', handler)
+    with ClientPool(max_workers=1, transport=transport) as pool:
+        for login in ('pool-a', 'pool-b'):
+            pool.get_client(login, 'password').set_rate_limiter(None)
+        # единственный поток занят, пока в очереди копятся запросы
+        gate = Event()
+        pool.submit('pool-gate', 'password', lambda client: gate.wait())
+        futures = [
+            pool.submit(login, 'password', MoySkladHttpClient.get, 'entity/product')
+            for login in ['pool-a'] * 3 + ['pool-b'] * 3
+        ]
+        gate.set()
+        for future in futures:
+            future.result(timeout=2)
+
+    assert order == [order[0], order[1]] * 3
+    assert order[0] != order[1]
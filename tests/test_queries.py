@@ -0,0 +1,39 @@
+from moysklad.queries import Expand, Filter, Ordering, Query, Select
+
+
+def test_filter_keeps_insertion_order():
+    raw = Filter().eq('name', 'a').gt('sum', 1).in_('id', ['x', 'y']).get_raw()
+    assert raw == 'name=a;sum>1;id=x;id=y'
+
+
+def test_ordering_keeps_insertion_order():
+    assert Ordering().desc('updated').asc('id').get_raw() == 'updated,desc;id,asc'
+
+
+def test_same_query_serializes_identically():
+    def build():
+        return Query(
+            Select(limit=10, offset=5),
+            Filter().eq('name', 'a').in_('id', ['x', 'y']),
+            Ordering().desc('updated'),
+            Expand('agent', 'positions'),
+        )
+
+    assert build().url_params == build().url_params
+    assert build().cache_key == build().cache_key
+    assert build() == build()
+    assert hash(build()) == hash(build())
+
+
+def test_cache_key_ignores_empty_params_and_part_order():
+    first = Query(Select(limit=10), Filter().eq('name', 'a'))
+    second = Query(Filter().eq('name', 'a'), Select(limit=10))
+    assert first.cache_key == second.cache_key
+
+
+def test_split_in_covers_all_values():
+    values = [str(index) for index in range(9)]
+    parts = Filter().eq('archived', False).in_('id', values).split_in(3)
+    raws = [part.get_raw() for part in parts]
+    assert all(raw.startswith('archived=False;') for raw in raws)
+    assert sorted(value for raw in raws for value in raw.split(';id=')[1:]) == sorted(values)
@@ -0,0 +1,104 @@
+import pytest
+
+from moysklad.http import MoySkladHttpClient, RateLimiter
+from moysklad.http import rate_limit
+from moysklad.http.utils import DEBUG_RATE_HEADERS
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(rate_limit, 'sleep', clock.sleep)
+    return clock
+
+
+def test_update_converts_interval_from_milliseconds(clock):
+    limiter = RateLimiter()
+
+    limiter.update({'X-RateLimit-Limit': '10', 'X-Lognex-Retry-TimeInterval': '2000',
+                    'X-RateLimit-Remaining': '4'})
+
+    assert limiter.limit == 10
+    assert limiter.interval == 2.0
+    assert limiter.tokens == 4
+    clock.now += 0.2
+    assert limiter.tokens == pytest.approx(5)
+
+
+def test_exhausted_budget_blocks_until_reset(clock):
+    limiter = RateLimiter(limit=10, interval=3)
+
+    limiter.update({'X-RateLimit-Remaining': '0', 'X-Lognex-Reset': '1500'})
+
+    assert limiter.available_in() == pytest.approx(1.5)
+    assert limiter.reserve() == pytest.approx(1.5)
+    clock.now += 1.5
+    # после сброса бюджет полный
+    assert limiter.tokens == 10
+    assert limiter.reserve() == 0
+
+
+def test_retry_after_blocks_with_single_token(clock):
+    limiter = RateLimiter(limit=10, interval=3)
+
+    limiter.update({'X-Lognex-Retry-After': '500'})
+
+    assert limiter.available_in() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert limiter.tokens == 1
+    assert limiter.reserve() == 0
+    assert limiter.available_in() == pytest.approx(0.3)
+
+
+def test_later_block_is_not_shortened(clock):
+    limiter = RateLimiter(limit=10, interval=3)
+
+    limiter.update({'X-RateLimit-Remaining': '0', 'X-Lognex-Reset': '2000'})
+    limiter.update({'X-Lognex-Retry-After': '500'})
+
+    assert limiter.available_in() == pytest.approx(2.0)
+
+
+def test_invalid_headers_are_ignored(clock):
+    limiter = RateLimiter(limit=10, interval=3)
+
+    limiter.update({'X-RateLimit-Limit': 'x', 'X-Lognex-Retry-TimeInterval': '0'})
+
+    assert limiter.limit == 10
+    assert limiter.interval == 3
+
+
+def test_acquire_sleeps_until_token_is_refilled(clock):
+    limiter = RateLimiter(limit=2, interval=1)
+
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == pytest.approx(0.5)
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+def test_rate_headers_are_requested_with_rate_limiter(transport):
+    transport.add_response('GET', 'entity/product', {'rows': []})
+    client = MoySkladHttpClient('test', 'password', transport=transport)
+    client.set_rate_limiter(RateLimiter())
+    client.get('entity/product')
+    client.set_rate_limiter(None)
+    client.get('entity/product')
+
+    with_limiter, without_limiter = transport.requests
+    assert all(with_limiter.headers[name] == value for name, value in DEBUG_RATE_HEADERS.items())
+    assert 'X-RateLimit-Limit' not in without_limiter.headers
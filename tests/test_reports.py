@@ -0,0 +1,99 @@
+import pytest
+
+from moysklad.reports import (
+    STOCK_BY_STORE_COLUMNS, Aggregation, Column, ColumnBatch, ReportReader, get_href_id,
+)
+
+from .conftest import paged_handler
+
+
+def stock_row(index):
+    return {
+        'meta': {'href': f'https://fake/entity/product/p{index}?expand=supplier'},
+        'name': f'Product {index}',
+        'code': str(index),
+        'stock': index,
+        'reserve': 1,
+        'price': 10.5,
+    }
+
+
+def by_store_row(index):
+    return {
+        'meta': {'href': f'https://fake/entity/product/p{index}'},
+        'stockByStore': [
+            {'meta': {'href': 'https://fake/entity/store/s1'}, 'name': 'Main',
+             'stock': index, 'reserve': 1, 'inTransit': 0},
+            {'meta': {'href': 'https://fake/entity/store/s2'}, 'name': 'Outlet',
+             'stock': 2, 'reserve': None, 'inTransit': 0},
+        ],
+    }
+
+
+def test_get_href_id():
+    assert get_href_id('https://fake/entity/product/p1?expand=x') == 'p1'
+    assert get_href_id('https://fake/entity/product/p1/') == 'p1'
+    assert get_href_id(None) == ''
+
+
+def test_column_reads_nested_values_with_defaults():
+    column = Column('supplier', 'supplier.name', str)
+    assert column.get({'supplier': {'name': 'ACME'}}) == 'ACME'
+    assert column.get({'supplier': None}) == ''
+    assert Column('stock').get({'stock': '3'}) == 3.0
+
+
+def test_read_collects_all_pages(client, transport):
+    rows = [stock_row(index) for index in range(2500)]
+    transport.add_handler('GET', 'report/stock/all', paged_handler(rows))
+
+    batch = ReportReader(client).read('stock', param='all')
+
+    assert len(batch) == 2500
+    assert sorted(batch['id'])[:2] == ['p0', 'p1']
+    assert sum(batch['stock']) == sum(range(2500))
+    assert batch['article'][0] == ''
+    assert batch['quantity'][0] == 0.0
+    assert len(transport.requests) == 3
+
+
+def test_iter_batches_yields_page_per_batch(client, transport):
+    rows = [stock_row(index) for index in range(2500)]
+    transport.add_handler('GET', 'report/stock/all', paged_handler(rows))
+
+    batches = list(ReportReader(client).iter_batches('stock', param='all', ordered=True))
+
+    assert [len(batch) for batch in batches] == [1000, 1000, 500]
+    assert list(batches[2]['code'][:1]) == ['2000']
+
+
+def test_read_explodes_and_aggregates(client, transport):
+    rows = [by_store_row(index) for index in range(1500)]
+    transport.add_handler('GET', 'report/stock/bystore', paged_handler(rows))
+
+    result = ReportReader(client).read(
+        'stock', STOCK_BY_STORE_COLUMNS, param='bystore', explode='stockByStore',
+        aggregate=Aggregation('store', ['stock', 'reserve']),
+    )
+
+    totals = {
+        store: (stock, reserve)
+        for store, stock, reserve in zip(result['store'], result['stock'], result['reserve'])
+    }
+    assert totals == {'Main': (sum(range(1500)), 1500.0), 'Outlet': (3000.0, 0.0)}
+
+
+def test_concat_without_batches_is_empty():
+    columns = (Column('id', dtype=str), Column('stock'))
+    batch = ColumnBatch.concat([], columns)
+    assert len(batch) == 0
+    assert len(batch['stock']) == 0
+
+
+def test_to_arrow():
+    pyarrow = pytest.importorskip('pyarrow')
+    batch = ColumnBatch.from_rows([stock_row(1), stock_row(2)], (Column('code', dtype=str),
+                                                                 Column('stock')))
+    record_batch = batch.to_arrow()
+    assert isinstance(record_batch, pyarrow.RecordBatch)
+    assert record_batch.column('stock').to_pylist() == [1.0, 2.0]
@@ -0,0 +1,54 @@
+import uuid
+
+from moysklad.resolver import ReferenceResolver
+
+from .conftest import get_params, json_response
+
+
+def filtered_handler(entity_type):
+    def handler(prepared):
+        ids = [part.split('=', 1)[1] for part in get_params(prepared)['filter'].split(';')]
+        rows = [{
+            'id': entity_id,
+            'name': f'{entity_type} {entity_id}',
+            'meta': {'href': f'https://fake/entity/{entity_type}/{entity_id}', 'type': entity_type},
+        } for entity_id in ids]
+        return json_response({'meta': {'size': len(rows)}, 'rows': rows})
+    return handler
+
+
+def make_rows(count):
+    ids = [str(uuid.UUID(int=index)) for index in range(count)]
+    rows = [{
+        'agent': {'meta': {'href': f'https://fake/entity/counterparty/{agent_id}',
+                           'type': 'counterparty'}},
+    } for agent_id in ids]
+    return ids, rows
+
+
+def test_resolve_splits_long_id_filters(client, transport):
+    transport.add_handler('GET', 'entity/counterparty', filtered_handler('counterparty'))
+    ids, rows = make_rows(250)
+
+    ReferenceResolver(client, batch_size=250).resolve(rows, ['agent'])
+
+    assert [row['agent']['id'] for row in rows] == ids
+    assert all(len(prepared.url) <= client.max_url_length for prepared in transport.requests)
+    assert len(transport.requests) > 3
+
+
+def test_default_batch_fits_into_one_request(client, transport):
+    transport.add_handler('GET', 'entity/counterparty', filtered_handler('counterparty'))
+    ids, rows = make_rows(250)
+
+    ReferenceResolver(client).resolve(rows, ['agent'])
+
+    assert [row['agent']['id'] for row in rows] == ids
+    # 90 id в пачке при max_url_length 4096, каждая пачка - один запрос
+    assert len(transport.requests) == 3
+    assert all(len(prepared.url) <= client.max_url_length for prepared in transport.requests)
+
+    client.set_max_url_length(2048)
+    ids, rows = make_rows(250)
+    ReferenceResolver(client).resolve(rows, ['agent'])
+    assert len(transport.requests) == 3 + 6
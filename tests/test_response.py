@@ -0,0 +1,38 @@
+from moysklad.http import RequestConfig
+
+ROWS = [{'id': '1'}, {'id': '2'}]
+HEADERS = {
+    'X-RateLimit-Remaining': '44',
+    'X-Lognex-Retry-TimeInterval': '3000',
+    'ETag': '"abc"',
+    'Set-Cookie': 'session=1',
+    'X-Request-Id': 'req',
+}
+
+
+def test_lean_response_drops_response_and_extra_headers(client, transport):
+    transport.add_response('GET', 'entity/product',
+                           {'context': {'employee': {}}, 'meta': {'size': 2}, 'rows': ROWS},
+                           headers=HEADERS)
+
+    res = client.get('entity/product', options=RequestConfig(keep_response=False))
+
+    assert res.response is None
+    assert res.rows == ROWS
+    assert res.meta == {'size': 2}
+    assert res.context == {'employee': {}}
+    assert res.status_code == 200
+    assert res.headers['x-ratelimit-remaining'] == '44'
+    assert res.headers['ETag'] == '"abc"'
+    assert 'Content-Type' in res.headers
+    assert 'Set-Cookie' not in res.headers
+    assert 'X-Request-Id' not in res.headers
+
+
+def test_full_response_is_kept_by_default(client, transport):
+    transport.add_response('GET', 'entity/product', {'rows': ROWS}, headers=HEADERS)
+
+    res = client.get('entity/product')
+
+    assert res.response is not None
+    assert res.headers['X-Request-Id'] == 'req'
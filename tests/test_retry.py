@@ -0,0 +1,74 @@
+import pytest
+from requests import ConnectionError as RequestsConnectionError
+
+from moysklad.exceptions import ApiResponseException
+from moysklad.http import RetryPolicy
+from moysklad.http.utils import HTTPMethod
+
+from .conftest import json_response
+
+
+def flaky_handler(calls, failures, status_code=429, headers=None):
+    def handler(prepared):
+        calls.append(prepared)
+        if len(calls) <= failures:
+            return json_response({'errors': [{'code': 1073, 'error': 'rate limit'}]},
+                                 status_code=status_code, headers=headers)
+        return json_response({'id': '1'})
+    return handler
+
+
+def test_get_is_retried_after_throttling(client, transport):
+    calls = []
+    transport.add_handler('GET', 'entity/product', flaky_handler(
+        calls, 2, headers={'X-Lognex-Retry-After': '1'},
+    ))
+    client.set_retry_policy(RetryPolicy(total=3))
+
+    assert client.get('entity/product').data == {'id': '1'}
+    assert len(calls) == 3
+    assert client.retry_policy.stats['retries_status'] == 2
+
+
+def test_retries_are_exhausted(client, transport):
+    calls = []
+    transport.add_handler('GET', 'entity/product', flaky_handler(calls, 10, status_code=503))
+    client.set_retry_policy(RetryPolicy(total=2, backoff_factor=0.001))
+
+    with pytest.raises(ApiResponseException):
+        client.get('entity/product')
+    assert len(calls) == 3
+    assert client.retry_policy.stats['exhausted'] == 1
+
+
+def test_post_is_not_retried(client, transport):
+    calls = []
+    transport.add_handler('POST', 'entity/product', flaky_handler(calls, 1, status_code=503))
+    client.set_retry_policy(RetryPolicy(total=3, backoff_factor=0.001))
+
+    with pytest.raises(ApiResponseException):
+        client.post('entity/product', data={'name': 'x'})
+    assert len(calls) == 1
+
+
+def test_connection_errors_are_retried(client, transport):
+    calls = []
+
+    def handler(prepared):
+        calls.append(prepared)
+        if len(calls) == 1:
+            raise RequestsConnectionError('reset')
+        return json_response({'id': '1'})
+
+    transport.add_handler('GET', 'entity/product', handler)
+    client.set_retry_policy(RetryPolicy(total=1, backoff_factor=0.001))
+
+    assert client.get('entity/product').data == {'id': '1'}
+    assert client.retry_policy.stats['retries_connection'] == 1
+
+
+def test_backoff_uses_retry_after_header_and_cap():
+    policy = RetryPolicy(backoff_factor=1, backoff_max=2)
+    assert policy.get_backoff(0, {'X-Lognex-Retry-After': '1500'}) == 1.5
+    assert all(0 <= policy.get_backoff(10) <= 2 for _ in range(20))
+    assert not policy.can_retry(HTTPMethod.POST, 0)
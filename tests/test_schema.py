@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from moysklad.schema import SchemaRegistry
+
+ATTRIBUTES = [
+    {'id': 'a1', 'name': 'Color', 'meta': {'href': 'https://fake/attributes/a1'}},
+    {'id': 'a2', 'name': 'Size', 'meta': {'href': 'https://fake/attributes/a2'}},
+]
+
+
+def test_attributes_are_indexed_by_id_and_name(client, transport):
+    transport.add_response('GET', 'entity/product/metadata', {'attributes': ATTRIBUTES})
+
+    schema = SchemaRegistry(client).get('product')
+
+    assert schema.get_attribute('a1') is schema.get_attribute('Color')
+    assert schema.get_attribute_by_name('Size')['id'] == 'a2'
+    assert schema.make_attribute_value('Size', 'XL') == {
+        'meta': {'href': 'https://fake/attributes/a2'}, 'value': 'XL',
+    }
+    with pytest.raises(KeyError):
+        schema.make_attribute_value('Weight', 1)
+
+
+def test_attributes_collection_is_fetched_separately(client, transport):
+    transport.add_response('GET', 'entity/product/metadata',
+                           {'attributes': {'meta': {'href': 'https://fake/attributes'}}})
+    transport.add_response('GET', 'entity/product/metadata/attributes',
+                           {'meta': {'size': 2}, 'rows': ATTRIBUTES})
+
+    schema = SchemaRegistry(client).get('product')
+
+    assert schema.get_attribute_by_id('a1')['name'] == 'Color'
+    assert len(transport.requests) == 2
+
+
+def test_schemas_are_cached_until_invalidated(client, transport):
+    transport.add_response('GET', 'entity/product/metadata', {'attributes': ATTRIBUTES})
+    transport.add_response('GET', 'entity/customerorder/metadata', {'attributes': []})
+    registry = SchemaRegistry(client)
+
+    registry.load(['product', 'customerorder'])
+    registry.get('product')
+    registry.get_attribute('customerorder', 'Color')
+    assert len(transport.requests) == 2
+
+    registry.invalidate('product')
+    registry.get('product')
+    assert len(transport.requests) == 3
+
+
+def test_stale_schema_is_refreshed_in_background(client, transport):
+    transport.add_response('GET', 'entity/product/metadata', {'attributes': ATTRIBUTES})
+    registry = SchemaRegistry(client, ttl=0.01)
+    registry.get('product')
+    transport.add_response('GET', 'entity/product/metadata', {'attributes': ATTRIBUTES[:1]})
+    time.sleep(0.02)
+
+    assert len(registry.get('product').attributes) == 2
+    deadline = time.monotonic() + 1
+    while len(registry.get('product').attributes) != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(registry.get('product').attributes) == 1
+
+
+def test_registry_is_shared_by_account(client):
+    SchemaRegistry._instances.pop(client.login, None)
+    try:
+        assert SchemaRegistry.for_account(client) is SchemaRegistry.for_account(client)
+    finally:
+        SchemaRegistry._instances.pop(client.login, None)
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from requests import Response
+
+from moysklad.http import RequestConfig, SingleFlight
+from moysklad.http.utils import ApiResponse
+
+from .conftest import json_response
+
+
+def slow_handler(calls, delay=0.1):
+    def handler(prepared):
+        calls.append(prepared)
+        time.sleep(delay)
+        return json_response({'meta': {'size': 1}, 'rows': [{'id': '1'}]})
+    return handler
+
+
+def test_identical_gets_are_coalesced(client, transport):
+    calls = []
+    transport.add_handler('GET', 'entity/product', slow_handler(calls))
+    client.set_single_flight(SingleFlight())
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(lambda _: client.get('entity/product'), range(5)))
+
+    assert len(calls) == 1
+    assert all(result.rows == [{'id': '1'}] for result in results)
+
+
+def test_gets_with_different_options_are_not_coalesced(client, transport):
+    calls = []
+    transport.add_handler('GET', 'entity/product', slow_handler(calls))
+    client.set_single_flight(SingleFlight())
+    options = [
+        None,
+        RequestConfig(raw_response=True),
+        RequestConfig(format_millisecond=True),
+        RequestConfig(custom_headers={'X-Test': '1'}),
+    ]
+
+    with ThreadPoolExecutor(max_workers=len(options)) as executor:
+        results = list(executor.map(
+            lambda config: client.get('entity/product', options=config), options,
+        ))
+
+    assert len(calls) == len(options)
+    assert isinstance(results[0], ApiResponse)
+    assert isinstance(results[1], Response)
@@ -0,0 +1,31 @@
+import time
+
+from moysklad.queries import Filter, Query
+
+from .conftest import get_params, json_response
+
+IDS = [f'{index:036d}' for index in range(300)]
+
+
+def filtered_handler(prepared):
+    ids = [part.split('=', 1)[1] for part in get_params(prepared)['filter'].split(';')]
+    # первые части отвечают дольше остальных
+    time.sleep(0.05 if IDS[0] in ids else 0)
+    rows = [{'id': entity_id} for entity_id in ids]
+    rows.append({'id': IDS[0]})
+    return json_response({'meta': {'size': len(rows)}, 'rows': rows})
+
+
+def test_long_in_filter_is_split_to_fit_url_length(client, transport):
+    transport.add_handler('GET', 'entity/product', filtered_handler)
+    rows = client.fetch_all('entity/product', Query(Filter().in_('id', IDS)))
+
+    assert len(transport.requests) > 1
+    assert all(len(prepared.url) <= client.max_url_length for prepared in transport.requests)
+    assert [row['id'] for row in rows] == IDS
+
+
+def test_split_pages_keep_query_order_when_ordered(client, transport):
+    transport.add_handler('GET', 'entity/product', filtered_handler)
+    pages = list(client.iter_pages_parallel('entity/product', Query(Filter().in_('id', IDS))))
+    assert [row['id'] for page in pages for row in page] == IDS
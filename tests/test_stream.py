@@ -0,0 +1,43 @@
+import json
+
+from moysklad.http import RequestConfig, StreamingApiResponse
+from moysklad.http.stream import iter_json_events
+from moysklad.http.utils import build_response
+
+ROWS = [{'id': str(index), 'name': f'товар "{index}" {{}}[],:'} for index in range(50)]
+BODY = json.dumps({
+    'context': {'employee': {}},
+    'meta': {'size': len(ROWS)},
+    'rows': ROWS,
+}, ensure_ascii=False).encode()
+
+
+def chunks(data: bytes, size: int):
+    return (data[index:index + size] for index in range(0, len(data), size))
+
+
+def test_events_do_not_depend_on_chunk_boundaries():
+    expected = list(iter_json_events(iter([BODY])))
+    for size in (1, 2, 3, 7, 64):
+        assert list(iter_json_events(chunks(BODY, size))) == expected
+    assert [value for key, value in expected if key == 'row'] == ROWS
+
+
+def test_root_array_is_streamed():
+    body = json.dumps(ROWS).encode()
+    assert [value for _, value in iter_json_events(chunks(body, 5))] == ROWS
+
+
+def test_streaming_response_exposes_meta_before_rows():
+    response = build_response(200, {'Content-Type': 'application/json'}, BODY)
+    streaming = StreamingApiResponse(response, chunk_size=3)
+    assert streaming.meta == {'size': len(ROWS)}
+    assert list(streaming) == ROWS
+
+
+def test_client_returns_streaming_response(client, transport):
+    transport.add_response('GET', 'entity/product', content=BODY,
+                           headers={'Content-Type': 'application/json'})
+    with client.get('entity/product', options=RequestConfig(stream=True)) as response:
+        assert isinstance(response, StreamingApiResponse)
+        assert list(response.rows) == ROWS
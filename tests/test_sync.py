@@ -0,0 +1,103 @@
+from moysklad.sync import EntitySync, SqliteSyncStore
+from moysklad.utils import MS_MATCH
+
+from .conftest import get_params, json_response
+
+
+def updated_at(second):
+    return f'2024-01-01 10:{second // 60:02d}:{second % 60:02d}.000'
+
+
+def keyset_handler(rows, on_request=None):
+    """Список с фильтром updatedFrom и сортировкой updated, id, как у МойСклад"""
+    def handler(prepared):
+        if on_request is not None:
+            on_request(len(requests))
+        requests.append(prepared)
+        params = get_params(prepared)
+        limit = int(params['limit'])
+        offset = int(params.get('offset', 0))
+        updated_from = params.get('updatedFrom', '')
+        matched = sorted(
+            (row for row in rows.values() if MS_MATCH.sub('', row['updated']) >= updated_from),
+            key=lambda row: (row['updated'], row['id']),
+        )
+        page = [dict(row) for row in matched[offset:offset + limit]]
+        return json_response({'meta': {'size': len(matched)}, 'rows': page})
+    requests = []
+    return handler
+
+
+def make_rows(count, second=None):
+    return {
+        f'{index:04d}': {
+            'id': f'{index:04d}',
+            'updated': updated_at(index if second is None else second),
+            'version': 1,
+        }
+        for index in range(count)
+    }
+
+
+def test_sync_orders_rows_and_stores_checkpoint(client, transport):
+    transport.add_handler('GET', 'entity/product', keyset_handler(make_rows(30)))
+    store = SqliteSyncStore()
+
+    assert EntitySync(client, store).sync('product') == 30
+    assert get_params(transport.requests[0])['order'] == 'updated,asc;id,asc'
+    assert store.get_checkpoint('test', 'product') == '2024-01-01 10:00:29.000'
+
+    EntitySync(client, store).sync('product')
+    assert get_params(transport.requests[-1])['updatedFrom'] == '2024-01-01 09:59:29'
+
+
+def test_pages_are_read_by_updated_key(client, transport):
+    transport.add_handler('GET', 'entity/product', keyset_handler(make_rows(25)))
+    store = SqliteSyncStore()
+
+    assert EntitySync(client, store, limit=10).sync('product') == 25
+
+    params = [get_params(prepared) for prepared in transport.requests]
+    assert [param.get('updatedFrom') for param in params] \
+        == [None, '2024-01-01 10:00:09', '2024-01-01 10:00:18']
+    assert {param['offset'] for param in params} == {'0'}
+    assert store.count('test', 'product') == 25
+
+
+def test_rows_changed_while_paging_are_not_skipped(client, transport):
+    rows = make_rows(25)
+
+    def change_rows(request_index):
+        if request_index == 1:
+            # уже прочитанная строка и еще не прочитанная уходят в конец списка
+            for id_ in ('0003', '0015'):
+                rows[id_] = dict(rows[id_], updated=updated_at(100), version=2)
+
+    transport.add_handler('GET', 'entity/product', keyset_handler(rows, change_rows))
+    store = SqliteSyncStore()
+
+    EntitySync(client, store, limit=10).sync('product')
+
+    assert store.count('test', 'product') == 25
+    assert store.get('test', 'product', '0003')['version'] == 2
+    assert store.get('test', 'product', '0015')['version'] == 2
+    assert store.get_checkpoint('test', 'product') == updated_at(100)
+
+
+def test_rows_with_same_updated_are_paged_by_offset(client, transport):
+    transport.add_handler('GET', 'entity/product', keyset_handler(make_rows(25, second=5)))
+    store = SqliteSyncStore()
+
+    assert EntitySync(client, store, limit=10).sync('product') == 25
+    assert [get_params(prepared)['offset'] for prepared in transport.requests] \
+        == ['0', '0', '10', '20']
+
+
+def test_checkpoint_does_not_pass_sync_start(client, transport):
+    rows = {'1': {'id': '1', 'updated': '2999-01-01 00:00:00.000'}}
+    transport.add_handler('GET', 'entity/product', keyset_handler(rows))
+    store = SqliteSyncStore()
+
+    EntitySync(client, store).sync('product')
+
+    assert store.get_checkpoint('test', 'product') < '2999'
@@ -0,0 +1,63 @@
+import pytest
+
+from moysklad.exceptions import AsyncTaskException
+from moysklad.http import ResponseCache
+from moysklad.http.utils import build_response
+from moysklad.tasks import AsyncTaskScheduler
+
+from .conftest import json_response
+
+
+@pytest.fixture
+def async_api(transport):
+    polls = {}
+
+    def start(prepared):
+        task_id = 'fail' if 'fail' in prepared.url else str(len(polls))
+        polls[task_id] = 0
+        return build_response(202, {
+            'Location': f'https://fake/api/remap/1.2/async/{task_id}',
+        }, b'')
+
+    def poll(prepared):
+        task_id = prepared.url.rsplit('/', 1)[-1]
+        polls[task_id] += 1
+        if polls[task_id] < 3:
+            state = 'PROCESSING'
+        else:
+            state = 'ERROR' if task_id == 'fail' else 'DONE'
+        return json_response({'id': task_id, 'state': state})
+
+    def result(prepared):
+        return json_response({'rows': [{'task': prepared.url.split('/')[-2]}]})
+
+    transport.add_handler('GET', 'report/stock/all', start)
+    transport.add_handler('GET', 'report/fail', start)
+    for task_id in ['fail'] + [str(index) for index in range(10)]:
+        transport.add_handler('GET', f'async/{task_id}', poll)
+        transport.add_handler('GET', f'async/{task_id}/result', result)
+    return polls
+
+
+def test_submit_inside_context_manager_resolves(client, async_api):
+    with AsyncTaskScheduler(client, poll_interval=0.01) as scheduler:
+        futures = [scheduler.submit('report/stock/all') for _ in range(3)]
+    assert sorted(future.result(timeout=2).rows[0]['task'] for future in futures) == ['0', '1', '2']
+
+
+def test_failed_task_raises(client, async_api):
+    with AsyncTaskScheduler(client, poll_interval=0.01) as scheduler:
+        future = scheduler.submit('report/fail')
+    with pytest.raises(AsyncTaskException):
+        future.result(timeout=2)
+
+
+def test_polling_bypasses_client_cache(client, async_api):
+    client.set_cache(ResponseCache(default_ttl=60))
+    scheduler = AsyncTaskScheduler(client, poll_interval=0.01)
+    try:
+        future = scheduler.submit('report/stock/all')
+        assert future.result(timeout=2).rows == [{'task': '0'}]
+    finally:
+        scheduler.shutdown(wait=False)
+    assert async_api['0'] == 3
@@ -0,0 +1,42 @@
+import pytest
+
+from moysklad.exceptions import ApiResponseException
+from moysklad.http import FakeTransport, HttpxTransport, MoySkladHttpClient, RequestConfig
+
+
+def test_fake_transport_records_prepared_requests(client, transport):
+    transport.add_response('GET', 'entity/product', {'rows': []})
+    client.get('entity/product', options=RequestConfig(custom_headers={'X-Test': '1'}))
+
+    prepared = transport.requests[-1]
+    assert prepared.method == 'GET'
+    assert prepared.headers['X-Test'] == '1'
+    assert prepared.headers['Authorization'].startswith('Basic ')
+
+
+def test_unknown_route_maps_to_api_error(client):
+    with pytest.raises(ApiResponseException) as info:
+        client.get('entity/missing')
+    assert info.value.response.status_code == 404
+
+
+def test_later_routes_take_precedence(client, transport):
+    transport.add_response('GET', 'entity/product', {'id': 'old'})
+    transport.add_response('GET', 'entity/product', {'id': 'new'})
+    assert client.get('entity/product').data == {'id': 'new'}
+
+
+def test_client_does_not_close_external_transport():
+    transport = FakeTransport()
+    transport.close = lambda: pytest.fail('external transport was closed')
+    MoySkladHttpClient('test', 'password', transport=transport).close()
+
+
+def test_httpx_transport_requires_httpx():
+    try:
+        import httpx  # noqa F401
+    except ImportError:
+        with pytest.raises(ImportError):
+            HttpxTransport()
+    else:
+        HttpxTransport().close()